@@ -1,32 +1,156 @@
 # app.py
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify, Response, g, abort
 import os
 import tempfile
 import uuid
 import json
-import whisper
 import subprocess
 import threading
 import re
 import time
-from werkzeug.utils import secure_filename
+from werkzeug.utils import secure_filename, safe_join
+from werkzeug.wsgi import wrap_file
+from werkzeug.http import is_resource_modified
+from urllib.parse import quote
+import mimetypes
 import shutil
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+import multiprocessing
+import numpy as np
+import hashlib
+import socket
+import wave
+import bisect
+import fcntl
+import sqlite3
+from collections import deque
+from contextlib import contextmanager
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['PROCESSED_FOLDER'] = 'processed'
+# Content-addressed store of sources, audio, probe data and transcripts shared across sessions.
+# Entries no session links to any more are kept as a cache within a byte budget and TTL
+app.config['MEDIA_STORE_FOLDER'] = 'media_store'
+app.config['MEDIA_STORE_MAX_BYTES'] = int(os.environ.get('WIZARDCUT_MEDIA_STORE_MAX_BYTES', 20 * 1024 ** 3))
+app.config['MEDIA_STORE_TTL'] = int(os.environ.get('WIZARDCUT_MEDIA_STORE_TTL', 7 * 24 * 3600))
 
 # Ensure upload and processed directories exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['PROCESSED_FOLDER'], exist_ok=True)
+os.makedirs(app.config['MEDIA_STORE_FOLDER'], exist_ok=True)
 
-# Create dictionary for preview cache
-app.config['PREVIEW_CACHE'] = {}
+# Media serving: set to an nginx internal location aliased to PROCESSED_FOLDER
+# (e.g. '/protected-media/') to let nginx stream files via X-Accel-Redirect
+app.config['MEDIA_ACCEL_REDIRECT'] = os.environ.get('WIZARDCUT_MEDIA_ACCEL_REDIRECT', '')
 
-# Load Whisper model (can choose size based on accuracy needs vs. performance)
-# Options: "tiny", "base", "small", "medium", "large"
-model = whisper.load_model("tiny")  # Good balance of accuracy and speed
+# Preview cache
+# Rendered previews and preview chunks are tracked in a SQLite index next to the
+# session folders, so the cache survives restarts and is shared between workers.
+# Entries are evicted least-recently-used first once a byte budget is exceeded.
+app.config['PREVIEW_CACHE_DB'] = os.path.join(app.config['PROCESSED_FOLDER'], 'preview_cache.db')
+app.config['PREVIEW_CACHE_MAX_BYTES'] = int(os.environ.get('WIZARDCUT_PREVIEW_CACHE_MAX_BYTES', 5 * 1024 ** 3))
+app.config['PREVIEW_CACHE_MAX_SESSION_BYTES'] = int(os.environ.get('WIZARDCUT_PREVIEW_CACHE_MAX_SESSION_BYTES', 1024 ** 3))
+app.config['PREVIEW_CACHE_MIN_AGE'] = 60  # Never evict entries used in the last minute
+
+# Default export engine for /edit: 'reencode' renders the whole timeline,
+# 'smart' stream-copies whole GOPs and only re-encodes around the cuts,
+# 'parallel' encodes balanced time chunks in a pool of ffmpeg processes
+app.config['EXPORT_MODE'] = os.environ.get('WIZARDCUT_EXPORT_MODE', 'reencode')
+app.config['EXPORT_WORKERS'] = int(os.environ.get('WIZARDCUT_EXPORT_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+app.config['EXPORT_MIN_CHUNK_SECONDS'] = 10  # Don't split the timeline finer than this
+app.config['SMART_RENDER_VERIFY'] = True  # Decode smart renders and fall back to re-encoding on errors
+# Up to this many kept segments are opened as separate seeked inputs, more are
+# read through a single concat demuxer input
+app.config['SEGMENT_INPUTS_MAX'] = int(os.environ.get('WIZARDCUT_SEGMENT_INPUTS_MAX', 32))
+
+# Preview engine for /preview_cuts: 'incremental' reuses per-segment chunks and
+# only encodes what changed, 'full' renders the whole preview in one pass
+app.config['PREVIEW_MODE'] = os.environ.get('WIZARDCUT_PREVIEW_MODE', 'incremental')
+
+# Streaming (HLS) previews: the playlist is returned as soon as the first
+# segments exist and keeps growing while ffmpeg renders the rest
+app.config['HLS_SEGMENT_SECONDS'] = 2
+app.config['HLS_START_TIMEOUT'] = 15  # Seconds to wait for the first segment
+
+# Audio is piped from ffmpeg straight into memory for transcription, audio.wav
+# is only written to the session (and media store) when this is enabled
+app.config['WRITE_AUDIO_WAV'] = os.environ.get('WIZARDCUT_WRITE_AUDIO_WAV', '0') == '1'
+
+# Silence detection: 'energy' measures the audio level, 'gaps' uses gaps between words
+app.config['SILENCE_DETECTION'] = os.environ.get('WIZARDCUT_SILENCE_DETECTION', 'energy')
+app.config['SILENCE_THRESHOLD_DB'] = -40.0  # Frames quieter than this are silent
+app.config['SILENCE_MIN_DURATION'] = 1.0  # Shortest silence worth marking, in seconds
+app.config['SILENCE_PADDING'] = 0.1  # Kept on each side of a silence next to speech
+
+# Kept pieces between cuts shorter than this (seconds) are cut as well
+app.config['SELECTION_MIN_KEEP'] = float(os.environ.get('WIZARDCUT_SELECTION_MIN_KEEP', 0.1))
+
+# Timeline overviews built at upload: waveform peaks and keyframe thumbnail sprites
+app.config['PEAKS_SAMPLES_PER_PEAK'] = 64  # Finest peaks level, 250 peaks per second at 16 kHz
+app.config['THUMBNAIL_INTERVAL'] = 2.0  # Minimum seconds between thumbnails
+app.config['THUMBNAIL_SIZE'] = (160, 90)  # Tile size in the sprite sheets
+app.config['THUMBNAIL_GRID'] = (10, 10)  # Columns x rows per sprite sheet
+
+# Number of background workers for upload processing (extraction + transcription)
+app.config['JOB_WORKERS'] = int(os.environ.get('WIZARDCUT_JOB_WORKERS', 2))
+app.config['JOB_TTL'] = int(os.environ.get('WIZARDCUT_JOB_TTL', 3600))  # Seconds a finished job stays queryable
+
+# Transcription settings
+# 'serial' transcribes the whole file in one pass, 'chunked' splits the audio at
+# quiet points and transcribes overlapping windows in a process pool, 'batched'
+# sends 30 s windows from every pending upload through one batched decoder
+# Model size: "tiny", "base", "small", "medium", "large" (speed vs. accuracy)
+app.config['WHISPER_MODEL'] = os.environ.get('WIZARDCUT_WHISPER_MODEL', 'tiny')
+# Load the model in a background thread when the server handles its first request
+# instead of on the first upload
+app.config['WHISPER_WARMUP'] = os.environ.get('WIZARDCUT_WHISPER_WARMUP', '1') != '0'
+app.config['TRANSCRIBE_MODE'] = os.environ.get('WIZARDCUT_TRANSCRIBE_MODE', 'serial')
+app.config['TRANSCRIBE_WORKERS'] = int(os.environ.get('WIZARDCUT_TRANSCRIBE_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+app.config['TRANSCRIBE_CHUNK_SECONDS'] = 120  # Target chunk length
+app.config['TRANSCRIBE_OVERLAP_SECONDS'] = 2  # Audio shared with each neighbouring chunk
+app.config['TRANSCRIBE_BATCH_SIZE'] = int(os.environ.get('WIZARDCUT_TRANSCRIBE_BATCH_SIZE', 8))
+app.config['TRANSCRIBE_BATCH_WAIT'] = 0.05  # Seconds to wait for other uploads to fill a batch
+
+# Whisper models
+# Importing whisper pulls in torch and loading weights takes seconds, so neither
+# happens at import time. Models are loaded on first use (or by the warm-up
+# thread) and shared by every request in the process. The warm-up starts from
+# the first request, so CLI commands and transcription pool processes that
+# import the app never load a model they don't use.
+models = {}
+models_lock = threading.Lock()
+model_warmup_started = False
+
+def get_model(name=None):
+    """Return the loaded Whisper model, loading it on first use"""
+    name = name or app.config['WHISPER_MODEL']
+    with models_lock:
+        if name not in models:
+            import whisper
+            started = time.time()
+            models[name] = whisper.load_model(name)
+            print(f"Loaded Whisper model '{name}' in {time.time() - started:.1f}s")
+        return models[name]
+
+def warm_up_model():
+    """Load the configured model in the background so the server starts immediately"""
+    def load():
+        try:
+            get_model()
+        except Exception as e:
+            print(f"Whisper warm-up failed: {e}")
+    threading.Thread(target=load, name='whisper-warmup', daemon=True).start()
+
+@app.before_request
+def start_model_warmup():
+    """Start the model warm-up from the first request this process serves"""
+    global model_warmup_started
+    if model_warmup_started or not app.config['WHISPER_WARMUP']:
+        return
+    model_warmup_started = True
+    warm_up_model()
 
 # Check for available hardware acceleration options
 def check_gpu_availability():
@@ -57,12 +181,50 @@ def check_gpu_availability():
     print("No GPU acceleration detected, using CPU")
     return 'cpu'
 
-# Determine available GPU acceleration
-gpu_type = check_gpu_availability()
+# Encoder detection is cached on disk keyed by the ffmpeg binary, so restarts and
+# worker forks don't spawn ffmpeg just to list encoders
+app.config['ENCODER_CACHE_FILE'] = 'encoder_cache.json'
+gpu_type = None
+gpu_type_lock = threading.Lock()
+
+def ffmpeg_fingerprint():
+    """Identify the installed ffmpeg binary so an upgrade invalidates cached detection"""
+    path = shutil.which('ffmpeg')
+    if not path:
+        return None
+    stat = os.stat(path)
+    return f"{os.path.realpath(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+def get_gpu_type():
+    """Determine available GPU acceleration, using the on-disk cache when valid"""
+    global gpu_type
+    with gpu_type_lock:
+        if gpu_type is not None:
+            return gpu_type
+        
+        fingerprint = ffmpeg_fingerprint()
+        cache_file = app.config['ENCODER_CACHE_FILE']
+        try:
+            with open(cache_file, 'r') as f:
+                cached = json.load(f)
+            if fingerprint and cached.get('ffmpeg') == fingerprint:
+                gpu_type = cached['gpu_type']
+                return gpu_type
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        gpu_type = check_gpu_availability()
+        if fingerprint:
+            try:
+                with open(cache_file, 'w') as f:
+                    json.dump({'ffmpeg': fingerprint, 'gpu_type': gpu_type}, f)
+            except OSError as e:
+                print(f"Could not write encoder cache: {e}")
+        return gpu_type
 
 # Configure video codec based on available hardware
-def get_encoder_settings(quality='high'):
-    """Get encoder settings based on available hardware and quality target"""
+def default_encoder_settings(gpu_type, quality='high'):
+    """Built-in encoder settings for a hardware type and quality target"""
     if gpu_type == 'nvidia':
         # NVIDIA GPU
         if quality == 'high':
@@ -150,10 +312,1339 @@ def get_encoder_settings(quality='high'):
                 'extra': []
             }
 
+# Encoder calibration
+# Instead of trusting the encoder list, short test encodes of a synthetic clip
+# are timed for every encoder that actually works here, over its presets (and
+# thread counts for libx264). Each quality tier then uses the fastest setting
+# whose SSIM against the clip meets the tier's target without spending more bits
+# than the tier's built-in setting. The result is saved per host and ffmpeg build
+# and used by get_encoder_settings(); until it exists the built-in settings apply.
+# Timings taken next to real work are noise, so calibration only runs from
+# `flask --app app calibrate-encoders` on an otherwise idle host.
+app.config['ENCODER_PROFILE_FILE'] = 'encoder_profile.json'
+app.config['CALIBRATION_CLIP'] = (1280, 720, 30, 3)  # Width, height, fps, seconds
+app.config['CALIBRATION_TARGET_SSIM'] = {'preview': 0.90, 'low': 0.95, 'high': 0.98}
+
+CALIBRATION_ENCODERS = {
+    'libx264': ('cpu', 'preset', ['ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium']),
+    'h264_nvenc': ('nvidia', 'preset', ['p1', 'p2', 'p3', 'p4', 'p5', 'p6', 'p7']),
+    'h264_amf': ('amd', 'quality', ['speed', 'balanced', 'quality']),
+    'h264_qsv': ('intel', 'preset', ['veryfast', 'faster', 'fast', 'medium'])
+}
+encoder_profile = None
+encoder_profile_lock = threading.Lock()
+
+def encoder_profile_identity():
+    """What a profile is only valid for"""
+    return {'host': socket.gethostname(), 'ffmpeg': ffmpeg_fingerprint(), 'cpu_count': os.cpu_count()}
+
+def get_encoder_profile():
+    """Return this host's calibrated encoder profile, or None if there is no valid one"""
+    global encoder_profile
+    with encoder_profile_lock:
+        if encoder_profile is None:
+            try:
+                with open(app.config['ENCODER_PROFILE_FILE'], 'r') as f:
+                    profile = json.load(f)
+                identity = encoder_profile_identity()
+                if all(profile.get(key) == value for key, value in identity.items()):
+                    encoder_profile = profile
+            except (OSError, ValueError):
+                pass
+        return encoder_profile
+
+def encoder_args(settings):
+    """FFmpeg output arguments for an encoder settings dict"""
+    args = ['-c:v', settings['c:v']]
+    for key in ('preset', 'crf', 'quality', 'threads'):
+        if key in settings:
+            args.extend([f'-{key}', settings[key]])
+    return args + settings['extra']
+
+def run_encoder_trial(settings, reference, seconds, work_folder):
+    """Time one test encode of the reference clip and measure its SSIM and bitrate"""
+    output = os.path.join(work_folder, f"trial_{uuid.uuid4().hex}.mp4")
+    try:
+        started = time.perf_counter()
+        subprocess.run(
+            ['ffmpeg', '-y', '-v', 'error', '-i', reference, *encoder_args(settings), '-an', output],
+            capture_output=True, check=True, timeout=max(60, seconds * 30)
+        )
+        elapsed = time.perf_counter() - started
+        result = subprocess.run(
+            ['ffmpeg', '-v', 'info', '-i', output, '-i', reference, '-lavfi', '[0:v][1:v]ssim', '-f', 'null', '-'],
+            capture_output=True, text=True, check=True
+        )
+        ssim = float(re.search(r'All:([\d.]+)', result.stderr).group(1))
+        return {
+            'settings': settings,
+            'seconds': round(elapsed, 3),
+            'ssim': round(ssim, 4),
+            'kbps': round(os.path.getsize(output) * 8 / seconds / 1000, 1)
+        }
+    finally:
+        if os.path.exists(output):
+            os.remove(output)
+
+def pick_fastest(trials, target, max_kbps):
+    """Fastest trial meeting the SSIM target within the bitrate budget, or None"""
+    passing = [trial for trial in trials if trial['ssim'] >= target and trial['kbps'] <= max_kbps]
+    return min(passing, key=lambda trial: trial['seconds']) if passing else None
+
+@contextmanager
+def calibration_host_lock():
+    """Hold the per-host calibration lock file so calibrations never time against each other"""
+    with open(f"{app.config['ENCODER_PROFILE_FILE']}.lock", 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        # Closing the file releases the lock
+        yield
+
+def calibrate_encoders():
+    """Run the test encodes, save the profile and start using it"""
+    global encoder_profile
+    with calibration_host_lock():
+        listed = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'], capture_output=True, text=True).stdout
+        width, height, fps, seconds = app.config['CALIBRATION_CLIP']
+        work_folder = tempfile.mkdtemp(prefix='wizardcut-calibration-')
+        try:
+            # Lossless noisy test pattern, so the encoders have real detail to spend bits on
+            reference = os.path.join(work_folder, 'reference.mkv')
+            subprocess.run([
+                'ffmpeg', '-y', '-v', 'error', '-f', 'lavfi',
+                '-i', f"testsrc2=size={width}x{height}:rate={fps}:duration={seconds},noise=alls=8:allf=t",
+                '-pix_fmt', 'yuv420p', '-c:v', 'ffv1', reference
+            ], check=True, capture_output=True)
+            
+            trials = []
+            selection = {}
+            usable = set()
+            thread_options = sorted({'0', str(os.cpu_count() or 1), str(max(1, (os.cpu_count() or 2) // 2))})
+            for quality, target in app.config['CALIBRATION_TARGET_SSIM'].items():
+                # The tier's built-in setting is the bitrate budget: at the same CRF a
+                # faster preset spends more bits, which would grow the output files
+                baseline = None
+                for gpu_type in dict.fromkeys([get_gpu_type(), 'cpu']):
+                    try:
+                        baseline = run_encoder_trial(default_encoder_settings(gpu_type, quality), reference, seconds, work_folder)
+                        usable.add(gpu_type)
+                        break
+                    except Exception as e:
+                        print(f"Calibration: built-in {gpu_type} {quality} setting failed: {e}")
+                if baseline is None:
+                    print(f"Calibration: no working built-in setting for {quality}, keeping it")
+                    continue
+                max_kbps = baseline['kbps']
+                tier_trials = [{**baseline, 'baseline': True}]
+                for encoder, (gpu_type, option, presets) in CALIBRATION_ENCODERS.items():
+                    if encoder not in listed:
+                        continue
+                    base = default_encoder_settings(gpu_type, quality)
+                    for preset in presets:
+                        settings = {**base, option: preset, 'extra': list(base['extra'])}
+                        try:
+                            tier_trials.append(run_encoder_trial(settings, reference, seconds, work_folder))
+                            usable.add(gpu_type)
+                        except Exception as e:
+                            # Listed but not usable here (no device, driver or session limit)
+                            print(f"Calibration: {encoder} {option}={preset} failed: {e}")
+                            if preset == presets[0]:
+                                break
+                
+                # Thread count only matters to the software encoder
+                best = pick_fastest(tier_trials, target, max_kbps)
+                if best and best['settings']['c:v'] == 'libx264':
+                    for threads in thread_options:
+                        settings = {**best['settings'], 'threads': threads, 'extra': list(best['settings']['extra'])}
+                        try:
+                            tier_trials.append(run_encoder_trial(settings, reference, seconds, work_folder))
+                        except Exception as e:
+                            print(f"Calibration: libx264 threads={threads} failed: {e}")
+                    best = pick_fastest(tier_trials, target, max_kbps)
+                
+                trials.extend({**trial, 'tier': quality} for trial in tier_trials)
+                if best:
+                    selection[quality] = best
+                    print(f"Calibration: {quality} -> {' '.join(encoder_args(best['settings']))} "
+                          f"({best['seconds']}s, SSIM {best['ssim']}, {best['kbps']} kbps)")
+                else:
+                    print(f"Calibration: nothing met SSIM {target} within {max_kbps} kbps for {quality}, "
+                          f"keeping the built-in settings")
+        finally:
+            shutil.rmtree(work_folder, ignore_errors=True)
+        
+        profile = {
+            **encoder_profile_identity(),
+            'created_at': time.time(),
+            'usable': sorted(usable),
+            'selection': selection,
+            'trials': trials
+        }
+        write_json_atomic(app.config['ENCODER_PROFILE_FILE'], profile)
+        with encoder_profile_lock:
+            encoder_profile = profile
+        return profile
+
+def get_encoder_settings(quality='high'):
+    """Get encoder settings for a quality target, calibrated for this host when profiled"""
+    profile = get_encoder_profile()
+    if profile and quality in profile['selection']:
+        settings = profile['selection'][quality]['settings']
+        return {**settings, 'extra': list(settings['extra'])}
+    gpu_type = get_gpu_type()
+    # Listed encoders that failed their test encodes fall back to software
+    if profile and gpu_type not in profile['usable']:
+        gpu_type = 'cpu'
+    return default_encoder_settings(gpu_type, quality)
+
+@app.cli.command('calibrate-encoders')
+def calibrate_encoders_command():
+    """Time test encodes and save this host's encoder profile"""
+    calibrate_encoders()
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+# Background jobs
+# Uploads are handed to a bounded worker pool so a long transcription doesn't
+# hold a request thread. Clients poll /jobs/<job_id> for status and results,
+# or follow /jobs/<job_id>/events for live progress. Edits and previews are
+# registered as jobs too so their ffmpeg progress can be followed. The job table
+# lives in this process, so the app must run as a single worker process (with
+# as many threads as needed); finished jobs are forgotten after JOB_TTL.
+job_executor = ThreadPoolExecutor(max_workers=app.config['JOB_WORKERS'])
+jobs = {}
+jobs_lock = threading.Lock()
+jobs_changed = threading.Condition(jobs_lock)
+
+def prune_jobs(now):
+    """Forget jobs that finished more than JOB_TTL seconds ago, call with jobs_lock held"""
+    cutoff = now - app.config['JOB_TTL']
+    for job_id in [k for k, job in jobs.items() if job['finished_at'] and job['finished_at'] < cutoff]:
+        del jobs[job_id]
+
+def create_job(session_id, filename, status='queued', job_id=None, kind='upload'):
+    """Register a new job and return its id"""
+    now = time.time()
+    with jobs_lock:
+        prune_jobs(now)
+        # Clients may choose the id so they can subscribe before the request returns
+        if not job_id or job_id in jobs:
+            job_id = str(uuid.uuid4())
+        jobs[job_id] = {
+            'job_id': job_id,
+            'kind': kind,
+            'session_id': session_id,
+            'filename': filename,
+            'status': status,
+            'stage': None,
+            'progress': None,
+            'error': None,
+            'created_at': now,
+            'finished_at': now if status == 'completed' else None,
+            'version': 0
+        }
+        jobs_changed.notify_all()
+    return job_id
+
+def update_job(job_id, **fields):
+    """Update fields on a job and wake up anyone following it"""
+    with jobs_lock:
+        if job_id in jobs:
+            jobs[job_id].update(fields)
+            jobs[job_id]['version'] += 1
+            jobs_changed.notify_all()
+
+def get_job(job_id):
+    """Return a snapshot of a job, or None if it doesn't exist"""
+    with jobs_lock:
+        job = jobs.get(job_id)
+        return dict(job) if job else None
+
+# FFmpeg progress
+# The job a thread is working for is kept in a thread local so helpers deep in
+# the render code report progress without passing job ids around. Work handed
+# to pool threads gets the job through run_with_progress(), along with a report
+# callback that combines the progress of all the pieces the job was split into.
+progress_context = threading.local()
+
+def parse_ffmpeg_time(stats):
+    """Output time in seconds from a -progress block"""
+    for key in ('out_time_us', 'out_time_ms'):
+        # out_time_ms is in microseconds as well, despite its name
+        value = stats.get(key, 'N/A')
+        if value not in ('', 'N/A'):
+            return max(0.0, int(value) / 1_000_000)
+    return 0.0
+
+def publish_progress(job_id, current, duration=None, fps=None, speed=None):
+    """Publish media time processed so far, with percent and ETA when duration is known"""
+    progress = {'time': round(current, 2), 'fps': fps, 'speed': speed, 'duration': None, 'percent': None, 'eta': None}
+    if duration:
+        progress['duration'] = round(duration, 2)
+        progress['percent'] = round(min(100.0, 100.0 * current / duration), 1)
+        if speed:
+            progress['eta'] = round(max(0.0, duration - current) / speed, 1)
+    update_job(job_id, progress=progress)
+
+def chunk_progress_reporters(job_id, durations):
+    """One report callback per chunk, publishing the chunks' combined progress to the job"""
+    total = sum(durations)
+    done = [0.0] * len(durations)
+    started = time.time()
+    lock = threading.Lock()
+    
+    def reporter(index):
+        def report(current, fps=None, speed=None):
+            with lock:
+                done[index] = max(done[index], min(current, durations[index]))
+                combined = sum(done)
+                # Chunks encode side by side, so speed is media time over wall time
+                elapsed = time.time() - started
+                publish_progress(job_id, combined, total, speed=round(combined / elapsed, 2) if combined and elapsed > 0 else None)
+        return report
+    return [reporter(index) for index in range(len(durations))]
+
+def run_with_progress(job_id, report, fn, *args):
+    """Call fn in a pool thread with its ffmpeg progress going to report on behalf of job_id"""
+    progress_context.job_id = job_id
+    progress_context.report = report
+    try:
+        return fn(*args)
+    finally:
+        progress_context.job_id = None
+        progress_context.report = None
+
+def ffmpeg_progress_args(cmd):
+    """Add machine readable key=value progress blocks on stdout, normal logging stays on stderr"""
+    return [cmd[0], '-progress', 'pipe:1', '-nostats'] + list(cmd[1:])
+
+def read_ffmpeg_progress(stream, report):
+    """Call report(time, fps, speed) for every complete -progress block until ffmpeg closes stdout"""
+    stats = {}
+    for line in stream:
+        key, _, value = line.strip().partition('=')
+        stats[key] = value
+        if key != 'progress':
+            continue
+        
+        # A block is complete, report it
+        speed = stats.get('speed', 'N/A').rstrip('x')
+        fps = stats.get('fps', 'N/A')
+        report(
+            parse_ffmpeg_time(stats),
+            fps=float(fps) if fps not in ('', 'N/A') else None,
+            speed=float(speed) if speed not in ('', 'N/A') else None
+        )
+        stats = {}
+
+def run_ffmpeg(cmd, duration=None, stage=None):
+    """Run an ffmpeg command, publishing progress to the current job if there is one"""
+    job_id = getattr(progress_context, 'job_id', None)
+    if job_id is None:
+        subprocess.run(cmd, check=True)
+        return
+    
+    if stage:
+        update_job(job_id, stage=stage)
+    
+    report = getattr(progress_context, 'report', None)
+    if report is None:
+        def report(current, fps=None, speed=None):
+            publish_progress(job_id, current, duration, fps=fps, speed=speed)
+    
+    cmd = ffmpeg_progress_args(cmd)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    read_ffmpeg_progress(proc.stdout, report)
+    proc.wait()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+def ffmpeg_time(seconds):
+    """Format seconds for an ffmpeg time option, which doesn't parse scientific notation"""
+    return f"{max(0.0, float(seconds)):.6f}"
+
+def faststart_args(output_file):
+    """Muxer options that write the moov atom first so playback starts before the download ends"""
+    if os.path.splitext(output_file)[1].lower() in ('.mp4', '.m4v', '.mov'):
+        return ['-movflags', '+faststart']
+    return []
+
+# Metrics
+# Stages of uploads and edits are timed with span(), which feeds a per-process
+# histogram by operation and stage and, while a request or job is being timed,
+# its own breakdown. Cache lookups are counted and in-flight jobs are read from
+# the job table when /metrics is scraped.
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+metrics_lock = threading.Lock()
+stage_histograms = {}  # (operation, stage) -> [bucket counts, sum, count]
+cache_counters = {}  # (cache, result) -> count
+timing_context = threading.local()
+
+def observe_stage(operation, stage, seconds):
+    with metrics_lock:
+        histogram = stage_histograms.setdefault((operation, stage), [[0] * len(STAGE_BUCKETS), 0.0, 0])
+        # Slower than the last bucket only shows up in +Inf (the count)
+        index = bisect.bisect_left(STAGE_BUCKETS, seconds)
+        if index < len(STAGE_BUCKETS):
+            histogram[0][index] += 1
+        histogram[1] += seconds
+        histogram[2] += 1
+
+def count_cache(cache, hit):
+    with metrics_lock:
+        key = (cache, 'hit' if hit else 'miss')
+        cache_counters[key] = cache_counters.get(key, 0) + 1
+
+def start_timing(operation):
+    """Start collecting spans for the request or job running on this thread"""
+    timing_context.operation = operation
+    timing_context.started = time.perf_counter()
+    timing_context.spans = []
+
+def stop_timing():
+    """Record the total and return this thread's span breakdown, or None if not timing"""
+    spans = getattr(timing_context, 'spans', None)
+    if spans is None:
+        return None
+    total = time.perf_counter() - timing_context.started
+    observe_stage(timing_context.operation, 'total', total)
+    timing_context.spans = None
+    timing_context.operation = None
+    return {'total': round(total, 4), 'stages': spans}
+
+@contextmanager
+def span(stage):
+    """Time a stage of the current operation"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        observe_stage(getattr(timing_context, 'operation', None) or 'other', stage, elapsed)
+        spans = getattr(timing_context, 'spans', None)
+        if spans is not None:
+            spans.append({'stage': stage, 'seconds': round(elapsed, 4)})
+
+def format_labels(**labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+def render_metrics():
+    """Current metrics in the Prometheus text exposition format"""
+    lines = [
+        '# HELP wizardcut_stage_seconds Time spent in each stage of uploads, previews and edits',
+        '# TYPE wizardcut_stage_seconds histogram'
+    ]
+    with metrics_lock:
+        histograms = {key: (list(counts), total, count) for key, (counts, total, count) in stage_histograms.items()}
+        counters = dict(cache_counters)
+    for (operation, stage), (counts, total, count) in sorted(histograms.items()):
+        labels = format_labels(operation=operation, stage=stage)
+        cumulative = 0
+        for bound, bucket in zip(STAGE_BUCKETS, counts):
+            cumulative += bucket
+            lines.append(f'wizardcut_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'wizardcut_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f'wizardcut_stage_seconds_sum{{{labels}}} {total:.6f}')
+        lines.append(f'wizardcut_stage_seconds_count{{{labels}}} {count}')
+    
+    lines.append('# HELP wizardcut_cache_requests_total Lookups in the media store and preview caches')
+    lines.append('# TYPE wizardcut_cache_requests_total counter')
+    for (cache, result), value in sorted(counters.items()):
+        lines.append(f'wizardcut_cache_requests_total{{{format_labels(cache=cache, result=result)}}} {value}')
+    
+    lines.append('# HELP wizardcut_jobs_in_flight Jobs queued or processing')
+    lines.append('# TYPE wizardcut_jobs_in_flight gauge')
+    in_flight = {(kind, status): 0 for kind in ('upload', 'preview', 'edit') for status in ('queued', 'processing')}
+    with jobs_lock:
+        for job in jobs.values():
+            if job['status'] in ('queued', 'processing'):
+                key = (job['kind'], job['status'])
+                in_flight[key] = in_flight.get(key, 0) + 1
+    for (kind, status), value in sorted(in_flight.items()):
+        lines.append(f'wizardcut_jobs_in_flight{{{format_labels(kind=kind, status=status)}}} {value}')
+    return '\n'.join(lines) + '\n'
+
+# Media store
+# Uploads are hashed while they are written. Everything derived from the bytes
+# lives under media_store/<sha256>/ and is hard-linked into session folders, so
+# a repeat upload skips extraction and transcription and shares the disk blocks.
+media_store_lock = threading.Lock()
+
+def media_store_dir(content_hash):
+    return os.path.join(app.config['MEDIA_STORE_FOLDER'], content_hash)
+
+def transcript_store_name(model_name):
+    return f"transcript_{model_name}.npz"
+
+def link_or_copy(src, dst):
+    """Hard-link src to dst, falling back to a copy across filesystems"""
+    tmp = f"{dst}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+def write_json_atomic(path, data):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+def save_upload_hashed(file, file_path, chunk_size=1024 * 1024):
+    """Stream an uploaded file to disk, returning the sha256 of its bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, 'wb') as out:
+        while True:
+            chunk = file.stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+def store_source(content_hash, file_path):
+    """Deduplicate the session copy of the source against the media store"""
+    store_dir = media_store_dir(content_hash)
+    with media_store_lock:
+        os.makedirs(store_dir, exist_ok=True)
+        store_source_path = os.path.join(store_dir, "source")
+        if os.path.exists(store_source_path):
+            # Same bytes already stored, replace our copy with a link to it
+            link_or_copy(store_source_path, file_path)
+        else:
+            link_or_copy(file_path, store_source_path)
+        # The entry's mtime is its last use for eviction
+        os.utime(store_dir)
+    prune_media_store()
+
+def prune_media_store(unlinked=False):
+    """Remove store entries no session links to, return how many were removed
+    
+    A session's copy of the source is a hard link to the entry's source, so an
+    entry whose source has a single link is only a cache. With unlinked, all of
+    those go; otherwise the least recently used ones past MEDIA_STORE_TTL or over
+    MEDIA_STORE_MAX_BYTES.
+    """
+    now = time.time()
+    removed = 0
+    with media_store_lock:
+        entries = []
+        for name in os.listdir(app.config['MEDIA_STORE_FOLDER']):
+            store_dir = os.path.join(app.config['MEDIA_STORE_FOLDER'], name)
+            try:
+                if os.stat(os.path.join(store_dir, "source")).st_nlink > 1:
+                    continue
+                last_used = os.stat(store_dir).st_mtime
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            entries.append((last_used, path_size(store_dir), store_dir))
+        
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for last_used, size, store_dir in entries:
+            expired = now - last_used > app.config['MEDIA_STORE_TTL']
+            if not (unlinked or expired or total > app.config['MEDIA_STORE_MAX_BYTES']):
+                break
+            shutil.rmtree(store_dir, ignore_errors=True)
+            total -= size
+            removed += 1
+    return removed
+
+# Media manifest
+# The source is analysed once: duration and stream parameters go to
+# manifest.json and the video keyframe times to keyframes.npy (sorted float64),
+# both kept in the media store and linked into the session. Renders read these
+# instead of running ffprobe, and keyframe lookups are binary searches.
+def analyze_media(file_path):
+    """Probe duration, container and first video/audio stream parameters"""
+    result = subprocess.run([
+        'ffprobe', '-v', 'error', '-show_entries',
+        'format=duration,format_name,bit_rate:'
+        'stream=codec_type,codec_name,profile,pix_fmt,width,height,r_frame_rate,avg_frame_rate,sample_rate,channels',
+        '-of', 'json', file_path
+    ], capture_output=True, text=True, check=True)
+    info = json.loads(result.stdout)
+    
+    streams = {}
+    for stream in info.get('streams', []):
+        streams.setdefault(stream.get('codec_type'), stream)
+    video = streams.get('video')
+    if video:
+        numerator, _, denominator = video.get('r_frame_rate', '').partition('/')
+        try:
+            video['fps'] = float(numerator) / float(denominator or 1)
+        except (ValueError, ZeroDivisionError):
+            video['fps'] = None
+    bit_rate = info['format'].get('bit_rate', '')
+    return {
+        'duration': float(info['format']['duration']),
+        'format': info['format'].get('format_name'),
+        'bit_rate': int(bit_rate) if bit_rate.isdigit() else None,
+        'video': video,
+        'audio': streams.get('audio')
+    }
+
+def get_keyframe_times(file_path):
+    """Get sorted video keyframe timestamps from packet flags (no decoding)"""
+    result = subprocess.run([
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', file_path
+    ], capture_output=True, text=True, check=True)
+    
+    keyframes = []
+    for line in result.stdout.splitlines():
+        parts = line.strip().split(',')
+        if len(parts) >= 2 and 'K' in parts[1] and parts[0] not in ('', 'N/A'):
+            keyframes.append(float(parts[0]))
+    return np.unique(np.array(keyframes, dtype=np.float64))
+
+def save_keyframes(path, keyframes):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'wb') as f:
+        np.save(f, keyframes)
+    os.replace(tmp, path)
+
+def get_media_manifest(content_hash, file_path):
+    """Load the manifest from the store, analysing the file if missing"""
+    manifest_path = os.path.join(media_store_dir(content_hash), "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    manifest = analyze_media(file_path)
+    write_json_atomic(manifest_path, manifest)
+    return manifest
+
+def load_media_manifest(session_folder, file_path):
+    """Load a session's manifest, analysing sessions that predate manifests on first use"""
+    manifest_path = os.path.join(session_folder, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    manifest = analyze_media(file_path)
+    write_json_atomic(manifest_path, manifest)
+    return manifest
+
+def load_keyframes(session_folder, file_path):
+    """Load a session's sorted keyframe times, scanning the file if the index is missing"""
+    keyframes_path = os.path.join(session_folder, "keyframes.npy")
+    if os.path.exists(keyframes_path):
+        return np.load(keyframes_path)
+    keyframes = get_keyframe_times(file_path)
+    save_keyframes(keyframes_path, keyframes)
+    return keyframes
+
+def keyframe_before(keyframes, t):
+    """Index of the last keyframe at or before t, -1 if there is none"""
+    return int(np.searchsorted(keyframes, t, side='right')) - 1
+
+def keyframe_after(keyframes, t):
+    """Index of the first keyframe at or after t, len(keyframes) if there is none"""
+    return int(np.searchsorted(keyframes, t, side='left'))
+
+def restore_cached_session(content_hash, session_folder):
+    """Link the cached transcript (and audio if stored) into a session, return True on a hit"""
+    store_dir = media_store_dir(content_hash)
+    store_audio = os.path.join(store_dir, "audio.wav")
+    store_transcript = os.path.join(store_dir, transcript_store_name(app.config['WHISPER_MODEL']))
+    if not os.path.exists(store_transcript):
+        # Entries stored before transcripts were packed hold JSON
+        legacy_transcript = os.path.join(store_dir, f"transcript_{app.config['WHISPER_MODEL']}.json")
+        if not os.path.exists(legacy_transcript):
+            return False
+        with open(legacy_transcript, 'r') as f:
+            save_transcript(store_transcript, pack_transcript(json.load(f)))
+    if os.path.exists(store_audio):
+        link_or_copy(store_audio, os.path.join(session_folder, "audio.wav"))
+    for name in ("manifest.json", "keyframes.npy", "energy.npy", "audio_signs.bin", "peaks.bin", "peaks.json"):
+        if os.path.exists(os.path.join(store_dir, name)):
+            link_or_copy(os.path.join(store_dir, name), os.path.join(session_folder, name))
+    store_thumbs = os.path.join(store_dir, "thumbnails")
+    if os.path.exists(os.path.join(store_thumbs, "thumbnails.json")):
+        os.makedirs(os.path.join(session_folder, "thumbnails"), exist_ok=True)
+        for name in os.listdir(store_thumbs):
+            link_or_copy(os.path.join(store_thumbs, name), os.path.join(session_folder, "thumbnails", name))
+    link_or_copy(store_transcript, os.path.join(session_folder, "transcript.npz"))
+    os.utime(store_dir)
+    return True
+
+def run_upload_job(job_id, session_folder, file_path, content_hash, early_audio=None):
+    """Extract audio and transcribe an uploaded video in the background"""
+    progress_context.job_id = job_id
+    start_timing('upload')
+    try:
+        store_dir = media_store_dir(content_hash)
+        store_audio = os.path.join(store_dir, "audio.wav")
+        audio_path = os.path.join(session_folder, "audio.wav")
+        
+        update_job(job_id, status='processing', stage='probing')
+        with span('probe'):
+            manifest = get_media_manifest(content_hash, file_path)
+            link_or_copy(os.path.join(store_dir, "manifest.json"), os.path.join(session_folder, "manifest.json"))
+        
+        # The keyframe index and thumbnails only need the video, build them while audio is processed
+        video_index_thread = threading.Thread(target=run_video_index_job, args=(file_path, session_folder, store_dir), daemon=True)
+        video_index_thread.start()
+        
+        update_job(job_id, stage='extracting_audio')
+        samples = None
+        if early_audio is not None:
+            # Audio was already being decoded while the upload arrived
+            try:
+                with span('wait_pipelined_audio'):
+                    samples = early_audio.result()
+            except Exception as e:
+                print(f"Pipelined extraction failed, extracting from the file: {e}")
+            # A file ffmpeg can't read from a pipe (e.g. an MP4 with its moov atom at the
+            # end) decodes to partial audio without an error, don't let it reach the store
+            if samples is not None and len(samples) / SAMPLE_RATE < manifest['duration'] - app.config['PIPELINED_AUDIO_TOLERANCE']:
+                print(f"Pipelined audio covers {len(samples) / SAMPLE_RATE:.1f}s of {manifest['duration']:.1f}s, extracting from the file")
+                samples = None
+        if samples is None:
+            with span('extract_audio'):
+                samples = extract_audio_pcm(file_path, manifest['duration'])
+        if app.config['WRITE_AUDIO_WAV']:
+            if os.path.exists(store_audio):
+                link_or_copy(store_audio, audio_path)
+            else:
+                write_wav(samples, audio_path)
+                link_or_copy(audio_path, store_audio)
+        
+        # Audio level envelope for silence detection, kept for later re-tuning
+        with span('energy_envelope'):
+            envelope = compute_energy_envelope(samples)
+        envelope_path = os.path.join(session_folder, "energy.npy")
+        np.save(envelope_path, envelope)
+        link_or_copy(envelope_path, os.path.join(store_dir, "energy.npy"))
+        
+        # Sample signs, so cut edges can be moved onto zero crossings
+        signs_path = os.path.join(session_folder, "audio_signs.bin")
+        with span('sign_bits'):
+            write_sign_bits(samples, signs_path)
+        link_or_copy(signs_path, os.path.join(store_dir, "audio_signs.bin"))
+        
+        # Waveform overview for the timeline
+        with span('peaks'):
+            write_peaks(samples, session_folder)
+        for name in ("peaks.bin", "peaks.json"):
+            link_or_copy(os.path.join(session_folder, name), os.path.join(store_dir, name))
+        
+        update_job(job_id, stage='transcribing')
+        transcript_data = transcribe_audio(samples, manifest['duration'], envelope)
+        
+        # Save transcript data
+        transcript_path = os.path.join(session_folder, "transcript.npz")
+        with span('save_transcript'):
+            save_transcript(transcript_path, pack_transcript(transcript_data))
+        link_or_copy(transcript_path, os.path.join(store_dir, transcript_store_name(app.config['WHISPER_MODEL'])))
+        
+        with span('wait_video_index'):
+            video_index_thread.join()
+        update_job(job_id, status='completed', stage=None, finished_at=time.time(), timings=stop_timing())
+    except Exception as e:
+        print(f"Upload job {job_id} failed: {e}")
+        update_job(job_id, status='failed', error=str(e), finished_at=time.time(), timings=stop_timing())
+    finally:
+        progress_context.job_id = None
+
+def extract_audio_pcm(file_path, duration=None, chunk_size=1024 * 1024, feeder=None):
+    """Decode 16 kHz mono float PCM from a video straight into a NumPy array
+    
+    With a feeder, ffmpeg reads the video from stdin and feeder(stdin) is run in a
+    thread to supply the bytes, e.g. while an upload is still arriving.
+    """
+    ffmpeg_cmd = [
+        'ffmpeg', '-nostdin', '-v', 'error', '-i', 'pipe:0' if feeder else file_path, '-vn',
+        '-f', 'f32le', '-acodec', 'pcm_f32le', '-ar', str(SAMPLE_RATE), '-ac', '1', 'pipe:1'
+    ]
+    proc = subprocess.Popen(ffmpeg_cmd, stdout=subprocess.PIPE, stdin=subprocess.PIPE if feeder else None)
+    if feeder:
+        threading.Thread(target=feeder, args=(proc.stdin,), daemon=True).start()
+    
+    # Preallocate from the probed duration and grow only if the estimate was short
+    capacity = int(((duration or 60) + 1) * SAMPLE_RATE) * 4
+    buffer = bytearray(capacity)
+    view = memoryview(buffer)
+    size = 0
+    job_id = getattr(progress_context, 'job_id', None)
+    started = last_published = time.time()
+    while True:
+        if size + chunk_size > len(buffer):
+            view.release()
+            buffer.extend(bytearray(max(chunk_size, len(buffer) // 2)))
+            view = memoryview(buffer)
+        read = proc.stdout.readinto(view[size:size + chunk_size])
+        if not read:
+            break
+        size += read
+        
+        # Bytes read tell us how much media time has been decoded
+        now = time.time()
+        if job_id and now - last_published >= 0.5:
+            current = size / 4 / SAMPLE_RATE
+            publish_progress(job_id, current, duration, speed=round(current / (now - started), 2))
+            last_published = now
+    view.release()
+    
+    proc.wait()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, ffmpeg_cmd)
+    
+    if job_id:
+        publish_progress(job_id, size / 4 / SAMPLE_RATE, duration)
+    
+    size -= size % 4
+    return np.frombuffer(buffer, dtype=np.float32, count=size // 4)
+
+def write_wav(samples, audio_path):
+    """Write float PCM samples as a 16-bit mono WAV"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(audio_path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm.tobytes())
+
+def load_samples(audio):
+    """Accept either PCM samples or a path to an audio file"""
+    if isinstance(audio, np.ndarray):
+        return audio
+    import whisper
+    return whisper.load_audio(audio)
+
+# Chunked transcription
+# Each pool process loads its own copy of the model once, in the initializer
+SAMPLE_RATE = 16000
+transcribe_pool = None
+transcribe_pool_lock = threading.Lock()
+_worker_model = None
+
+def _init_transcribe_worker(model_name, torch_threads):
+    """Load a Whisper model in a pool worker process"""
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except Exception:
+        pass
+    _worker_model = get_model(model_name)
+
+def _transcribe_chunk(samples, offset):
+    """Transcribe one chunk of PCM samples and shift word times by offset"""
+    result = _worker_model.transcribe(
+        samples,
+        word_timestamps=True,
+        language="en"
+    )
+    words = []
+    for segment in result["segments"]:
+        for word_info in segment.get("words", []):
+            words.append({
+                'word': word_info['word'],
+                'start': word_info['start'] + offset,
+                'end': word_info['end'] + offset
+            })
+    return words
+
+def get_transcribe_pool():
+    """Create the transcription process pool on first use"""
+    global transcribe_pool
+    with transcribe_pool_lock:
+        if transcribe_pool is None:
+            workers = app.config['TRANSCRIBE_WORKERS']
+            torch_threads = max(1, (os.cpu_count() or 1) // workers)
+            # spawn avoids forking a process that already has torch threads running
+            transcribe_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_transcribe_worker,
+                initargs=(app.config['WHISPER_MODEL'], torch_threads)
+            )
+        return transcribe_pool
+
+def find_chunk_boundaries(samples, chunk_seconds, search_seconds=5.0, frame_seconds=0.02):
+    """Pick chunk boundaries (in seconds) at the quietest point near each target"""
+    frame_len = int(SAMPLE_RATE * frame_seconds)
+    n_frames = len(samples) // frame_len
+    total_seconds = len(samples) / SAMPLE_RATE
+    if n_frames == 0 or total_seconds <= chunk_seconds:
+        return [0.0, total_seconds]
+    
+    # Frame-level RMS energy for the whole file in one go
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+    energy = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+    
+    boundaries = [0.0]
+    target = chunk_seconds
+    while target < total_seconds - search_seconds:
+        lo = max(int((target - search_seconds) / frame_seconds), int(boundaries[-1] / frame_seconds) + 1)
+        hi = min(int((target + search_seconds) / frame_seconds), n_frames)
+        if lo >= hi:
+            break
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        boundaries.append(quietest * frame_seconds)
+        target = boundaries[-1] + chunk_seconds
+    boundaries.append(total_seconds)
+    return boundaries
+
+def transcribe_words_chunked(audio):
+    """Transcribe audio as overlapping chunks in parallel and stitch the words"""
+    samples = load_samples(audio)
+    boundaries = find_chunk_boundaries(samples, app.config['TRANSCRIBE_CHUNK_SECONDS'])
+    overlap = app.config['TRANSCRIBE_OVERLAP_SECONDS']
+    total_seconds = len(samples) / SAMPLE_RATE
+    
+    pool = get_transcribe_pool()
+    futures = []
+    for i in range(len(boundaries) - 1):
+        # Pad each window so words straddling a boundary are heard in full
+        win_start = max(0.0, boundaries[i] - overlap)
+        win_end = min(total_seconds, boundaries[i + 1] + overlap)
+        chunk = samples[int(win_start * SAMPLE_RATE):int(win_end * SAMPLE_RATE)]
+        futures.append(pool.submit(_transcribe_chunk, chunk, win_start))
+    
+    # Each chunk owns the words whose midpoint falls between its own boundaries,
+    # which drops the duplicates transcribed in the overlap
+    words = []
+    for i, future in enumerate(futures):
+        own_start, own_end = boundaries[i], boundaries[i + 1]
+        is_last = i == len(futures) - 1
+        for word in future.result():
+            mid = (word['start'] + word['end']) / 2
+            if mid >= own_start and (mid < own_end or is_last):
+                words.append(word)
+    
+    words.sort(key=lambda w: w['start'])
+    return words
+
+# Batched transcription
+# Uploads split their audio at quiet points into windows of at most 30 s (one
+# Whisper context) and queue them with a single service thread. The service
+# takes windows round-robin across uploads, so a long recording can't starve a
+# short one, decodes the batch in one forward pass per step, aligns words per
+# window and hands each upload its words back.
+WHISPER_WINDOW_SECONDS = 30
+batch_pending = {}  # request id -> deque of (request, index, offset, samples)
+batch_cond = threading.Condition()
+batch_thread = None
+
+def ensure_batch_service():
+    """Start the batch transcription thread on first use"""
+    global batch_thread
+    with batch_cond:
+        if batch_thread is None:
+            batch_thread = threading.Thread(target=batch_service_loop, name='whisper-batcher', daemon=True)
+            batch_thread.start()
+
+def take_batch():
+    """Take up to TRANSCRIBE_BATCH_SIZE windows, one per upload in turn"""
+    batch = []
+    with batch_cond:
+        while batch_pending and len(batch) < app.config['TRANSCRIBE_BATCH_SIZE']:
+            for request_id in list(batch_pending):
+                windows = batch_pending[request_id]
+                batch.append(windows.popleft())
+                if not windows:
+                    del batch_pending[request_id]
+                if len(batch) >= app.config['TRANSCRIBE_BATCH_SIZE']:
+                    break
+    return batch
+
+def deliver_window(request, index, words=None, error=None):
+    """Store a window result and wake the upload once all its windows are in"""
+    with batch_cond:
+        request['results'][index] = words or []
+        if error is not None:
+            request['error'] = error
+        request['remaining'] -= 1
+        if request['remaining'] == 0:
+            request['done'].set()
+
+def batch_service_loop():
+    while True:
+        with batch_cond:
+            batch_cond.wait_for(lambda: batch_pending)
+            waiting = sum(len(windows) for windows in batch_pending.values())
+        
+        # Give concurrent uploads a moment to join a batch that isn't full yet
+        if waiting < app.config['TRANSCRIBE_BATCH_SIZE']:
+            time.sleep(app.config['TRANSCRIBE_BATCH_WAIT'])
+        
+        batch = take_batch()
+        try:
+            for (request, index, _, _), words in zip(batch, decode_window_batch(batch)):
+                deliver_window(request, index, words)
+        except Exception as e:
+            print(f"Batched transcription failed: {e}")
+            for request, index, _, _ in batch:
+                deliver_window(request, index, error=e)
+
+def decode_window_batch(batch):
+    """Decode a batch of windows together and return the words for each"""
+    import torch
+    import whisper
+    from whisper.timing import add_word_timestamps
+    from whisper.tokenizer import get_tokenizer
+    
+    model = get_model()
+    mels = [
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(samples), model.dims.n_mels)
+        for _, _, _, samples in batch
+    ]
+    options = whisper.DecodingOptions(
+        language="en",
+        without_timestamps=True,  # Word times come from alignment below
+        fp16=model.device.type == 'cuda'
+    )
+    results = whisper.decode(model, torch.stack(mels).to(model.device), options)
+    tokenizer = get_tokenizer(
+        model.is_multilingual, num_languages=model.num_languages,
+        language="en", task="transcribe"
+    )
+    
+    batch_words = []
+    for (_, _, offset, samples), mel, result in zip(batch, mels, results):
+        # Same no-speech rule transcribe() uses to drop silent windows
+        if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+            batch_words.append([])
+            continue
+        
+        segment = {
+            'seek': 0,
+            'start': 0.0,
+            'end': len(samples) / SAMPLE_RATE,
+            'text': result.text,
+            'tokens': result.tokens
+        }
+        add_word_timestamps(
+            segments=[segment], model=model, tokenizer=tokenizer,
+            mel=mel.to(model.device), num_frames=len(samples) // whisper.audio.HOP_LENGTH,
+            last_speech_timestamp=0.0
+        )
+        batch_words.append([
+            {'word': w['word'], 'start': w['start'] + offset, 'end': w['end'] + offset}
+            for w in segment.get('words', [])
+        ])
+    return batch_words
+
+def transcribe_words_batched(audio):
+    """Queue an upload's audio windows with the batch service and wait for the words"""
+    samples = load_samples(audio)
+    
+    # Cut at quiet points with enough slack that no window exceeds 30 s
+    boundaries = find_chunk_boundaries(samples, WHISPER_WINDOW_SECONDS - 2, search_seconds=2.0)
+    n_windows = len(boundaries) - 1
+    request = {
+        'results': [None] * n_windows,
+        'remaining': n_windows,
+        'error': None,
+        'done': threading.Event()
+    }
+    windows = deque(
+        (request, i, boundaries[i],
+         samples[int(boundaries[i] * SAMPLE_RATE):int(boundaries[i + 1] * SAMPLE_RATE)])
+        for i in range(n_windows)
+    )
+    
+    ensure_batch_service()
+    with batch_cond:
+        batch_pending[uuid.uuid4().hex] = windows
+        batch_cond.notify_all()
+    
+    request['done'].wait()
+    if request['error'] is not None:
+        raise request['error']
+    
+    return [word for window_words in request['results'] for word in window_words]
+
+def transcribe_words(audio):
+    """Return a flat list of {'word', 'start', 'end'} for PCM samples or an audio file"""
+    if app.config['TRANSCRIBE_MODE'] == 'chunked':
+        return transcribe_words_chunked(audio)
+    if app.config['TRANSCRIBE_MODE'] == 'batched':
+        return transcribe_words_batched(audio)
+    
+    # Transcribe audio with timestamps
+    result = get_model().transcribe(
+        audio, 
+        word_timestamps=True,
+        language="en"  # Can be modified or auto-detected
+    )
+    
+    return [
+        {'word': w['word'], 'start': w['start'], 'end': w['end']}
+        for segment in result["segments"]
+        for w in segment["words"]
+    ]
+
+# Silence detection
+# 'energy' finds quiet stretches in the audio itself from a frame-level dB
+# envelope, 'gaps' uses the gaps between Whisper word timestamps. The envelope
+# is saved with the session so silences can be re-tuned without re-decoding.
+ENERGY_FRAME_SECONDS = 0.01
+
+def compute_energy_envelope(samples):
+    """Frame-level RMS level in dBFS for the whole signal in one go"""
+    frame_len = int(SAMPLE_RATE * ENERGY_FRAME_SECONDS)
+    n_frames = len(samples) // frame_len
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return (20 * np.log10(np.maximum(rms, 1e-10))).astype(np.float32)
+
+def find_silences(envelope, threshold_db, min_duration, padding):
+    """Return (start, end) runs quieter than threshold_db lasting at least min_duration"""
+    quiet = np.concatenate(([False], envelope < threshold_db, [False]))
+    edges = np.flatnonzero(np.diff(quiet.astype(np.int8)))
+    starts = edges[0::2] * ENERGY_FRAME_SECONDS
+    ends = edges[1::2] * ENERGY_FRAME_SECONDS
+    
+    # Leave a little room around speech, except at the very start and end of the file
+    total = len(envelope) * ENERGY_FRAME_SECONDS
+    starts = np.where(starts > 0, starts + padding, starts)
+    ends = np.where(ends < total, ends - padding, ends)
+    
+    keep = (ends - starts) >= min_duration
+    return [(float(start), float(end)) for start, end in zip(starts[keep], ends[keep])]
+
+def find_gap_silences(words, video_duration, silence_threshold=1.0):
+    """Return (start, end) gaps between words of at least silence_threshold seconds"""
+    silences = []
+    prev_end_time = 0
+    for word_info in words:
+        # Check for silence between words
+        if word_info['start'] - prev_end_time >= silence_threshold:
+            silences.append((prev_end_time, word_info['start']))
+        prev_end_time = word_info['end']
+    
+    # Check for silence at the end of the video
+    if video_duration - prev_end_time >= silence_threshold:
+        silences.append((prev_end_time, video_duration))
+    return silences
+
+def detect_silences(words, video_duration, envelope=None, threshold_db=None, min_duration=None, padding=None):
+    """Silences for a transcript, using the energy envelope when one is available"""
+    if envelope is None or app.config['SILENCE_DETECTION'] != 'energy':
+        return find_gap_silences(words, video_duration)
+    return find_silences(
+        envelope,
+        app.config['SILENCE_THRESHOLD_DB'] if threshold_db is None else threshold_db,
+        app.config['SILENCE_MIN_DURATION'] if min_duration is None else min_duration,
+        app.config['SILENCE_PADDING'] if padding is None else padding
+    )
+
+def build_transcript(words, silences):
+    """Merge words and (start, end) silences into the transcript format, ordered by time"""
+    transcript_data = [{
+        'word': word_info['word'],
+        'start': word_info['start'],
+        'end': word_info['end'],
+        'is_silence': False
+    } for word_info in words]
+    transcript_data.extend({
+        'word': '[silence]',
+        'start': start,
+        'end': end,
+        'is_silence': True,
+        'duration': round(end - start, 1)
+    } for start, end in silences)
+    transcript_data.sort(key=lambda entry: (entry['start'], entry['end']))
+    return transcript_data
+
+def transcribe_audio(audio, video_duration, envelope=None):
+    """Transcribe audio and build the word/silence transcript"""
+    with span('transcribe'):
+        words = transcribe_words(audio)
+    with span('silence_detection'):
+        silences = detect_silences(words, video_duration, envelope)
+    return build_transcript(words, silences)
+
+# Transcript store
+# Transcripts are kept as parallel arrays in transcript.npz: start and end times,
+# an index into an interned word table and a bitmap of silence flags. Entries are
+# ordered by start time and a running maximum of the end times makes finding the
+# entries in a time window two binary searches.
+def pack_transcript(transcript_data):
+    """Pack transcript entries into arrays"""
+    vocab = {}
+    word_ids = [vocab.setdefault(entry['word'], len(vocab)) for entry in transcript_data]
+    return {
+        'start': np.array([entry['start'] for entry in transcript_data], dtype=np.float32),
+        'end': np.array([entry['end'] for entry in transcript_data], dtype=np.float32),
+        'word_id': np.array(word_ids, dtype=np.int32),
+        'silence': np.packbits(np.array([entry['is_silence'] for entry in transcript_data], dtype=bool)),
+        'count': np.int64(len(transcript_data)),
+        # Words never contain newlines, so the table is stored as one UTF-8 blob
+        'words': np.frombuffer('\n'.join(vocab).encode('utf-8'), dtype=np.uint8)
+    }
+
+def save_transcript(path, packed):
+    """Write packed transcript arrays, replacing the file since it may be hard-linked"""
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'wb') as f:
+        np.savez(f, **packed)
+    os.replace(tmp, path)
+
+def load_transcript(session_folder):
+    """Load a session's transcript arrays, or None if there is no transcript yet"""
+    path = os.path.join(session_folder, "transcript.npz")
+    if not os.path.exists(path):
+        # Sessions created before transcripts were packed are converted on first use
+        legacy_path = os.path.join(session_folder, "transcript.json")
+        if not os.path.exists(legacy_path):
+            return None
+        with open(legacy_path, 'r') as f:
+            save_transcript(path, pack_transcript(json.load(f)))
+    
+    with np.load(path) as data:
+        count = int(data['count'])
+        transcript = {
+            'start': data['start'],
+            'end': data['end'],
+            'word_id': data['word_id'],
+            'silence': np.unpackbits(data['silence'], count=count).astype(bool),
+            'vocab': bytes(data['words']).decode('utf-8').split('\n')
+        }
+    transcript['max_end'] = np.maximum.accumulate(transcript['end']) if count else transcript['end']
+    return transcript
+
+def transcript_window(transcript, start, end):
+    """Index range [first, last) of the entries overlapping start..end seconds"""
+    first = int(np.searchsorted(transcript['max_end'], start, side='right'))
+    last = int(np.searchsorted(transcript['start'], end, side='left'))
+    return first, max(first, last)
+
+def transcript_columns(transcript, first, last):
+    """Entries first..last as parallel lists"""
+    return {
+        'word': [transcript['vocab'][i] for i in transcript['word_id'][first:last].tolist()],
+        'start': np.round(transcript['start'][first:last].astype(np.float64), 3).tolist(),
+        'end': np.round(transcript['end'][first:last].astype(np.float64), 3).tolist(),
+        'is_silence': transcript['silence'][first:last].tolist()
+    }
+
+def transcript_entries(transcript, first, last):
+    """Entries first..last in the per-word transcript format"""
+    columns = transcript_columns(transcript, first, last)
+    entries = []
+    for word, start, end, is_silence in zip(columns['word'], columns['start'], columns['end'], columns['is_silence']):
+        entry = {'word': word, 'start': start, 'end': end, 'is_silence': is_silence}
+        if is_silence:
+            entry['duration'] = round(end - start, 1)
+        entries.append(entry)
+    return entries
+
+# Timeline overviews
+# Waveform peaks are a pyramid of min/max pairs, quantized to int8 and stored
+# level after level in peaks.bin, each level halving the resolution of the one
+# before. Thumbnails are taken from keyframes only, so no frame is decoded in
+# full, and tiled into JPEG sprite sheets with their times in thumbnails.bin
+# (float32). Zooming the timeline only reads slices of these files.
+PEAKS_MIN_LEVEL_LENGTH = 1024  # Stop halving once a level is this short
+
+def compute_peaks_pyramid(samples, samples_per_peak):
+    """Return [(samples_per_peak, int8 interleaved min/max pairs)] from finest to coarsest"""
+    n_peaks = max(1, -(-len(samples) // samples_per_peak))
+    padded = np.zeros(n_peaks * samples_per_peak, dtype=np.float32)
+    padded[:len(samples)] = samples
+    frames = padded.reshape(n_peaks, samples_per_peak)
+    lows, highs = frames.min(axis=1), frames.max(axis=1)
+    
+    levels = []
+    while True:
+        pairs = np.stack([lows, highs], axis=1).ravel()
+        levels.append((samples_per_peak, np.clip(np.round(pairs * 127), -127, 127).astype(np.int8)))
+        if len(lows) <= PEAKS_MIN_LEVEL_LENGTH:
+            return levels
+        # Each coarser peak covers two finer ones
+        if len(lows) % 2:
+            lows, highs = np.append(lows, lows[-1]), np.append(highs, highs[-1])
+        lows = np.minimum(lows[0::2], lows[1::2])
+        highs = np.maximum(highs[0::2], highs[1::2])
+        samples_per_peak *= 2
+
+def write_peaks(samples, session_folder):
+    """Write peaks.bin and its level index peaks.json to the session folder"""
+    levels = []
+    offset = 0
+    tmp = os.path.join(session_folder, f"peaks.bin.{uuid.uuid4().hex}.tmp")
+    with open(tmp, 'wb') as f:
+        for samples_per_peak, pairs in compute_peaks_pyramid(samples, app.config['PEAKS_SAMPLES_PER_PEAK']):
+            f.write(pairs.tobytes())
+            levels.append({'samples_per_peak': samples_per_peak, 'offset': offset, 'count': len(pairs) // 2})
+            offset += len(pairs)
+    os.replace(tmp, os.path.join(session_folder, "peaks.bin"))
+    write_json_atomic(os.path.join(session_folder, "peaks.json"), {
+        'sample_rate': SAMPLE_RATE,
+        'format': 'int8 min/max pairs',
+        'levels': levels
+    })
+
+def write_thumbnails(file_path, session_folder):
+    """Tile keyframe thumbnails into sprite sheets, with their times in thumbnails.bin"""
+    width, height = app.config['THUMBNAIL_SIZE']
+    columns, rows = app.config['THUMBNAIL_GRID']
+    thumbs_folder = os.path.join(session_folder, "thumbnails")
+    tmp_folder = f"{thumbs_folder}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp_folder)
+    try:
+        # Only keyframes are decoded; select keeps one every THUMBNAIL_INTERVAL
+        # and showinfo logs the time of every frame that goes into a tile
+        filters = [
+            f"select='isnan(prev_selected_t)+gte(t-prev_selected_t,{app.config['THUMBNAIL_INTERVAL']})'",
+            'showinfo',
+            f"scale={width}:{height}:force_original_aspect_ratio=decrease",
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2",
+            f"tile={columns}x{rows}"
+        ]
+        result = subprocess.run([
+            'ffmpeg', '-y', '-nostdin', '-v', 'info', '-skip_frame', 'nokey', '-i', file_path,
+            '-an', '-vf', ','.join(filters), '-vsync', 'vfr', '-q:v', '5',
+            os.path.join(tmp_folder, 'sprite_%04d.jpg')
+        ], capture_output=True, text=True, check=True)
+        times = np.array(re.findall(r'\[Parsed_showinfo.*?pts_time:\s*([-\d.]+)', result.stderr), dtype=np.float32)
+        times.tofile(os.path.join(tmp_folder, "thumbnails.bin"))
+        write_json_atomic(os.path.join(tmp_folder, "thumbnails.json"), {
+            'width': width,
+            'height': height,
+            'columns': columns,
+            'rows': rows,
+            'count': len(times),
+            'sheets': sorted(name for name in os.listdir(tmp_folder) if name.endswith('.jpg'))
+        })
+        shutil.rmtree(thumbs_folder, ignore_errors=True)
+        os.replace(tmp_folder, thumbs_folder)
+    finally:
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+
+def store_thumbnails(session_folder, store_dir):
+    """Link a session's thumbnail sprites into the media store"""
+    store_thumbs = os.path.join(store_dir, "thumbnails")
+    os.makedirs(store_thumbs, exist_ok=True)
+    thumbs_folder = os.path.join(session_folder, "thumbnails")
+    for name in os.listdir(thumbs_folder):
+        link_or_copy(os.path.join(thumbs_folder, name), os.path.join(store_thumbs, name))
+
+def run_video_index_job(file_path, session_folder, store_dir):
+    """Build the keyframe index and thumbnails alongside transcription
+    
+    Failures only lose the index (rebuilt on demand) or the thumbnails.
+    """
+    timing_context.operation = 'upload'
+    try:
+        keyframes_path = os.path.join(session_folder, "keyframes.npy")
+        with span('keyframe_index'):
+            save_keyframes(keyframes_path, get_keyframe_times(file_path))
+        link_or_copy(keyframes_path, os.path.join(store_dir, "keyframes.npy"))
+    except Exception as e:
+        print(f"Keyframe indexing failed: {e}")
+    try:
+        with span('thumbnails'):
+            write_thumbnails(file_path, session_folder)
+        store_thumbnails(session_folder, store_dir)
+    except Exception as e:
+        print(f"Thumbnail generation failed: {e}")
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'video' not in request.files:
@@ -162,6 +1653,7 @@ def upload_file():
     file = request.files['video']
     if file.filename == '':
         return jsonify({'error': 'No video file selected'}), 400
+    start_timing('upload_request')
     
     # Generate unique ID for this edit session
     session_id = str(uuid.uuid4())
@@ -171,81 +1663,1247 @@ def upload_file():
     # Save the uploaded file
     filename = secure_filename(file.filename)
     file_path = os.path.join(session_folder, filename)
-    file.save(file_path)
+    with span('save_upload'):
+        content_hash = save_upload_hashed(file, file_path)
+        store_source(content_hash, file_path)
     
-    # Extract audio from video
-    audio_path = os.path.join(session_folder, "audio.wav")
+    return start_transcription(session_id, session_folder, filename, file_path, content_hash)
+
+def start_transcription(session_id, session_folder, filename, file_path, content_hash, early_audio=None):
+    """Finish from the media store or queue an upload job, returning the upload response"""
+    # Seen these bytes before with this model, nothing left to do
+    with span('media_store_lookup'):
+        cached = restore_cached_session(content_hash, session_folder)
+    count_cache('media_store', cached)
+    if cached:
+        job_id = create_job(session_id, filename, status='completed')
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'session_id': session_id,
+            'filename': filename,
+            'status': 'completed',
+            'cached': True
+        })
     
-    # Run audio extraction
-    ffmpeg_cmd = [
-        'ffmpeg', '-y', '-i', file_path, '-vn', '-acodec', 'pcm_s16le', 
-        '-ar', '16000', '-ac', '1', audio_path
-    ]
+    # Hand extraction and transcription to the worker pool
+    job_id = create_job(session_id, filename)
+    job_executor.submit(run_upload_job, job_id, session_folder, file_path, content_hash, early_audio)
     
-    subprocess.run(ffmpeg_cmd, check=True)
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'session_id': session_id,
+        'filename': filename,
+        'status': 'queued',
+        'cached': False
+    }), 202
+
+# Chunked uploads
+# Large recordings are sent as fixed-size chunks, each verified against its
+# SHA-256 and written at its offset, so a dropped connection only costs the
+# chunks in flight. Received chunks are recorded in upload.json in the session
+# folder so an upload can resume after a restart. While chunks arrive in order,
+# audio extraction already runs on the bytes received so far.
+app.config['UPLOAD_CHUNK_SIZE'] = 8 * 1024 * 1024
+app.config['UPLOAD_PIPELINE_EXTRACTION'] = True
+app.config['UPLOAD_IDLE_TIMEOUT'] = 600  # Seconds without new bytes before pipelined extraction gives up
+app.config['PIPELINED_AUDIO_TOLERANCE'] = 1.0  # Pipelined audio shorter than the file by more than this is re-extracted
+uploads = {}
+uploads_cond = threading.Condition()
+
+def get_upload_state(upload_id):
+    """Return the in-memory state for an upload, reloading it from disk if needed"""
+    try:
+        upload_id = str(uuid.UUID(upload_id))
+    except ValueError:
+        return None
+    with uploads_cond:
+        if upload_id in uploads:
+            return uploads[upload_id]
+        state_path = os.path.join(app.config['PROCESSED_FOLDER'], upload_id, "upload.json")
+        if not os.path.exists(state_path):
+            return None
+        with open(state_path, 'r') as f:
+            saved = json.load(f)
+        state = dict(saved, received=set(saved['received']), early_audio=None)
+        uploads[upload_id] = state
+        return state
+
+def save_upload_state(state):
+    saved = {key: value for key, value in state.items() if key not in ('received', 'early_audio', 'aborted')}
+    saved['received'] = sorted(state['received'])
+    write_json_atomic(os.path.join(state['session_folder'], "upload.json"), saved)
+
+def contiguous_bytes(state):
+    """Number of bytes from the start of the file that have all arrived"""
+    n = 0
+    while n in state['received']:
+        n += 1
+    return min(n * state['chunk_size'], state['size'])
+
+def start_early_extraction(state):
+    """Decode audio from the received prefix of the upload as it grows"""
+    future = Future()
     
-    # Transcribe audio with timestamps
-    result = model.transcribe(
-        audio_path, 
-        word_timestamps=True,
-        language="en"  # Can be modified or auto-detected
-    )
+    def feed(stdin):
+        sent = 0
+        try:
+            with open(state['file_path'], 'rb') as f:
+                while sent < state['size']:
+                    with uploads_cond:
+                        # An upload that is abandoned rather than completed or cleaned up
+                        # must not hold this thread and ffmpeg forever, a resumed upload
+                        # falls back to extracting from the file
+                        arrived = uploads_cond.wait_for(
+                            lambda: contiguous_bytes(state) > sent or state.get('aborted'),
+                            timeout=app.config['UPLOAD_IDLE_TIMEOUT']
+                        )
+                        if not arrived:
+                            print(f"Upload {state['upload_id']} idle, stopping pipelined extraction")
+                            state['aborted'] = True
+                        if state.get('aborted'):
+                            return
+                        available = contiguous_bytes(state)
+                    f.seek(sent)
+                    while sent < available:
+                        block = f.read(min(1024 * 1024, available - sent))
+                        stdin.write(block)
+                        sent += len(block)
+        except (BrokenPipeError, OSError):
+            # ffmpeg gave up (e.g. the container needs seeking), the job falls back
+            pass
+        finally:
+            try:
+                stdin.close()
+            except OSError:
+                pass
     
-    # Process words with timestamps and detect silence
-    transcript_data = []
-    prev_end_time = 0
-    silence_threshold = 1.0  # Silence threshold in seconds
+    def run():
+        try:
+            samples = extract_audio_pcm(state['file_path'], feeder=feed)
+            # ffmpeg exits cleanly on the EOF of an aborted feed, its audio is only a prefix
+            if state.get('aborted'):
+                raise RuntimeError("upload was aborted")
+            future.set_result(samples)
+        except Exception as e:
+            future.set_exception(e)
     
-    # Get video duration
-    video_duration = get_video_duration(file_path)
+    threading.Thread(target=run, name='early-extraction', daemon=True).start()
+    return future
+
+def abort_upload(upload_id):
+    """Forget an in-progress upload and stop its pipelined extraction"""
+    with uploads_cond:
+        state = uploads.pop(upload_id, None)
+        if state:
+            state['aborted'] = True
+            uploads_cond.notify_all()
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    data = request.json or {}
+    filename = secure_filename(data.get('filename', ''))
+    try:
+        size = int(data.get('size', 0))
+    except (TypeError, ValueError):
+        size = 0
+    if not filename or size <= 0:
+        return jsonify({'success': False, 'error': 'Missing required data'}), 400
     
-    for segment in result["segments"]:
-        for word_info in segment["words"]:
-            current_start_time = word_info['start']
+    # The upload id doubles as the edit session id
+    session_id = str(uuid.uuid4())
+    session_folder = os.path.join(app.config['PROCESSED_FOLDER'], session_id)
+    os.makedirs(session_folder, exist_ok=True)
+    file_path = os.path.join(session_folder, filename)
+    with open(file_path, 'wb') as f:
+        f.truncate(size)
+    
+    chunk_size = app.config['UPLOAD_CHUNK_SIZE']
+    state = {
+        'upload_id': session_id,
+        'session_folder': session_folder,
+        'filename': filename,
+        'file_path': file_path,
+        'size': size,
+        'chunk_size': chunk_size,
+        'n_chunks': (size + chunk_size - 1) // chunk_size,
+        'received': set(),
+        'early_audio': None
+    }
+    with uploads_cond:
+        uploads[session_id] = state
+    save_upload_state(state)
+    
+    return jsonify({
+        'success': True,
+        'upload_id': session_id,
+        'chunk_size': chunk_size,
+        'n_chunks': state['n_chunks']
+    })
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    state = get_upload_state(upload_id)
+    if not state:
+        return jsonify({'success': False, 'error': 'Upload not found'}), 404
+    with uploads_cond:
+        received = sorted(state['received'])
+    return jsonify({
+        'success': True,
+        'upload_id': state['upload_id'],
+        'size': state['size'],
+        'chunk_size': state['chunk_size'],
+        'n_chunks': state['n_chunks'],
+        'received': received
+    })
+
+@app.route('/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    state = get_upload_state(upload_id)
+    if not state:
+        return jsonify({'success': False, 'error': 'Upload not found'}), 404
+    if index < 0 or index >= state['n_chunks']:
+        return jsonify({'success': False, 'error': 'Chunk index out of range'}), 400
+    
+    body = request.get_data(cache=False)
+    expected_size = min(state['chunk_size'], state['size'] - index * state['chunk_size'])
+    if len(body) != expected_size:
+        return jsonify({'success': False, 'error': 'Chunk has the wrong size'}), 400
+    checksum = request.headers.get('X-Chunk-SHA256', '').lower()
+    if checksum and hashlib.sha256(body).hexdigest() != checksum:
+        return jsonify({'success': False, 'error': 'Chunk checksum mismatch'}), 400
+    
+    fd = os.open(state['file_path'], os.O_WRONLY)
+    try:
+        os.pwrite(fd, body, index * state['chunk_size'])
+    finally:
+        os.close(fd)
+    
+    with uploads_cond:
+        state['received'].add(index)
+        # Start decoding audio as soon as the head of the file is here
+        if index == 0 and state['early_audio'] is None and app.config['UPLOAD_PIPELINE_EXTRACTION']:
+            state['early_audio'] = start_early_extraction(state)
+        uploads_cond.notify_all()
+        save_upload_state(state)
+        received = len(state['received'])
+    
+    return jsonify({'success': True, 'received': received, 'n_chunks': state['n_chunks']})
+
+@app.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    state = get_upload_state(upload_id)
+    if not state:
+        return jsonify({'success': False, 'error': 'Upload not found'}), 404
+    with uploads_cond:
+        missing = [i for i in range(state['n_chunks']) if i not in state['received']]
+    if missing:
+        return jsonify({'success': False, 'error': 'Upload incomplete', 'missing': missing}), 409
+    
+    # Hash the assembled file for the media store
+    start_timing('upload_request')
+    digest = hashlib.sha256()
+    with span('hash_upload'), open(state['file_path'], 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    store_source(digest.hexdigest(), state['file_path'])
+    
+    with uploads_cond:
+        uploads.pop(state['upload_id'], None)
+    os.remove(os.path.join(state['session_folder'], "upload.json"))
+    
+    return start_transcription(
+        state['upload_id'], state['session_folder'], state['filename'],
+        state['file_path'], digest.hexdigest(), None if state.get('aborted') else state['early_audio']
+    )
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = get_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    return jsonify({'success': True, **job})
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-Sent Events stream of job status and ffmpeg progress"""
+    def generate():
+        last_version = None
+        # Clients may subscribe just before the request that creates the job
+        deadline = time.time() + 10
+        
+        def changed():
+            if job_id not in jobs:
+                return time.time() > deadline
+            return jobs[job_id]['version'] != last_version
+        
+        while True:
+            with jobs_changed:
+                jobs_changed.wait_for(changed, timeout=5)
+                job = dict(jobs[job_id]) if job_id in jobs else None
             
-            # Check for silence between words
-            silence_duration = current_start_time - prev_end_time
-            if silence_duration >= silence_threshold:
-                transcript_data.append({
-                    'word': '[silence]',
-                    'start': prev_end_time,
-                    'end': current_start_time,
-                    'is_silence': True,
-                    'duration': round(silence_duration, 1)
-                })
+            if job is None:
+                if time.time() > deadline:
+                    yield f"event: error\ndata: {json.dumps({'error': 'Job not found'})}\n\n"
+                    return
+                continue
             
-            # Add the actual word
-            transcript_data.append({
-                'word': word_info['word'],
-                'start': word_info['start'],
-                'end': word_info['end'],
-                'is_silence': False
-            })
+            if job['version'] == last_version:
+                # Keep the connection alive through proxies
+                yield ": keepalive\n\n"
+                continue
             
-            prev_end_time = word_info['end']
+            last_version = job['version']
+            yield f"data: {json.dumps(job)}\n\n"
+            if job['status'] in ('completed', 'failed'):
+                return
     
-    # Check for silence at the end of the video
-    if video_duration - prev_end_time >= silence_threshold:
-        transcript_data.append({
-            'word': '[silence]',
-            'start': prev_end_time,
-            'end': video_duration,
-            'is_silence': True,
-            'duration': round(video_duration - prev_end_time, 1)
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    job = get_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    if job['status'] == 'failed':
+        return jsonify({'success': False, 'status': job['status'], 'error': job['error']}), 500
+    
+    if job['status'] != 'completed':
+        # Not ready yet, client should keep polling
+        return jsonify({'success': False, 'status': job['status'], 'stage': job['stage']}), 202
+    
+    session_folder = os.path.join(app.config['PROCESSED_FOLDER'], job['session_id'])
+    transcript = load_transcript(session_folder)
+    if transcript is None:
+        return jsonify({'success': False, 'error': 'Session files not found'}), 404
+    
+    result = {
+        'success': True,
+        'job_id': job_id,
+        'session_id': job['session_id'],
+        'filename': job['filename'],
+        'transcript': transcript_entries(transcript, 0, len(transcript['start']))
+    }
+    # Stage breakdown of the background job, next to the request's own ?timings=1 breakdown
+    if request.args.get('timings') == '1':
+        result['job_timings'] = job.get('timings')
+    return jsonify(result)
+
+# Smart render
+# Keeps the source encode for every GOP that lies entirely inside a kept segment
+# and only re-encodes the partial GOPs at each cut edge, then joins the pieces
+# with the concat demuxer
+SMART_RENDER_VIDEO_CODECS = {'h264'}
+
+def plan_smart_render(segments_to_keep, keyframes):
+    """Split kept segments into ('copy'|'encode', start, end) pieces"""
+    pieces = []
+    for segment in segments_to_keep:
+        start, end = segment['start'], segment['end']
+        if end <= start:
+            continue
+        
+        # First keyframe at/after the cut-in and last keyframe at/before the cut-out.
+        # GOPs between them are fully inside the segment.
+        i = keyframe_after(keyframes, start)
+        j = keyframe_before(keyframes, end)
+        if i < len(keyframes) and j >= 0 and keyframes[i] < keyframes[j]:
+            copy_start, copy_end = keyframes[i], keyframes[j]
+            if copy_start > start:
+                pieces.append(('encode', start, copy_start))
+            pieces.append(('copy', copy_start, copy_end))
+            if end > copy_end:
+                pieces.append(('encode', copy_end, end))
+        else:
+            pieces.append(('encode', start, end))
+    return pieces
+
+def smart_render(original_file, segments_to_keep, output_file, session_folder, manifest):
+    """Render a straight cut with stream copy where possible, return False if unsupported"""
+    video = manifest.get('video')
+    audio = manifest.get('audio')
+    if not video or video.get('codec_name') not in SMART_RENDER_VIDEO_CODECS:
+        return False
+    
+    try:
+        keyframes = load_keyframes(session_folder, original_file)
+    except Exception as e:
+        print(f"Smart render keyframe scan failed: {e}")
+        return False
+    pieces = plan_smart_render(segments_to_keep, keyframes)
+    if not pieces:
+        return False
+    
+    pieces_folder = os.path.join(session_folder, "smart_render")
+    os.makedirs(pieces_folder, exist_ok=True)
+    
+    # Edge pieces are encoded to match the source stream so the concat demuxer
+    # can join them with copied GOPs. The pieces are video only: the audio is cut
+    # from the source and encoded once over the whole cut list, so AAC priming
+    # never adds a gap at a piece join.
+    match_video = ['-c:v', 'libx264', '-preset', 'medium', '-crf', '18',
+                   '-pix_fmt', video.get('pix_fmt', 'yuv420p'),
+                   '-r', video.get('r_frame_rate', '30/1')]
+    profile = (video.get('profile') or '').lower()
+    if profile in ('baseline', 'main', 'high'):
+        match_video.extend(['-profile:v', profile])
+    match_audio = []
+    if audio:
+        match_audio = ['-c:a', 'aac', '-ar', str(audio.get('sample_rate', 48000)),
+                       '-ac', str(audio.get('channels', 2))]
+    
+    try:
+        list_path = os.path.join(pieces_folder, "concat.txt")
+        with open(list_path, 'w') as concat_list:
+            for i, (kind, start, end) in enumerate(pieces):
+                piece_path = os.path.join(pieces_folder, f"piece_{i:05d}.ts")
+                cmd = [
+                    'ffmpeg', '-y', '-ss', ffmpeg_time(start), '-i', original_file,
+                    '-t', ffmpeg_time(end - start), '-map', '0:v:0'
+                ]
+                if kind == 'copy':
+                    cmd.extend(['-c:v', 'copy', '-avoid_negative_ts', 'make_zero'])
+                else:
+                    cmd.extend(match_video)
+                cmd.extend(['-f', 'mpegts', piece_path])
+                run_ffmpeg(cmd, end - start, stage=f"smart_render {kind} {i + 1}/{len(pieces)}")
+                concat_list.write(f"file '{os.path.abspath(piece_path)}'\n")
+        
+        join_cmd = ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', list_path]
+        if audio:
+            audio_inputs, audio_lines = build_cut_graph(
+                original_file, segments_to_keep, os.path.join(pieces_folder, "segments.txt"),
+                video_label=None, first_input=1
+            )
+            join_cmd.extend([*audio_inputs, '-filter_complex', ';'.join(audio_lines), '-map', '0:v', '-map', '[acut]'])
+        join_cmd.extend(['-c:v', 'copy', *match_audio])
+        mp4 = os.path.splitext(output_file)[1].lower() in ('.mp4', '.m4v', '.mov')
+        if mp4 and any(kind == 'encode' for kind, _, _ in pieces):
+            # Encoded edges carry their own SPS/PPS in band, which avc1 doesn't allow
+            # beyond the parameter sets in the sample entry
+            join_cmd.extend(['-tag:v', 'avc3'])
+        total = sum(end - start for _, start, end in pieces)
+        run_ffmpeg([*join_cmd, *faststart_args(output_file), output_file], total, stage='joining')
+        
+        # A player is less forgiving than the muxer, make sure the joined file decodes cleanly
+        if app.config['SMART_RENDER_VERIFY']:
+            run_ffmpeg(['ffmpeg', '-v', 'error', '-xerror', '-i', output_file, '-f', 'null', '-'], total, stage='verifying')
+    except Exception as e:
+        print(f"Smart render failed, falling back to full re-encode: {e}")
+        return False
+    finally:
+        shutil.rmtree(pieces_folder, ignore_errors=True)
+    
+    encoded = sum(end - start for kind, start, end in pieces if kind == 'encode')
+    print(f"Smart render: {len(pieces)} pieces, {encoded:.1f}s re-encoded")
+    return True
+
+# Parallel export
+# Splits the kept timeline into balanced chunks, encodes them concurrently and
+# joins the video losslessly. Audio is carried as PCM in the chunks and encoded
+# once at the end so AAC priming never adds gaps at chunk joins.
+CHUNK_MIN_PIECE = 1e-3  # Float leftovers shorter than this never become pieces of their own
+
+def split_into_chunks(segments_to_keep, n_chunks):
+    """Split kept segments into n_chunks lists of roughly equal total duration"""
+    total = sum(seg['end'] - seg['start'] for seg in segments_to_keep)
+    if n_chunks <= 1 or total <= 0:
+        return [list(segments_to_keep)]
+    
+    target = total / n_chunks
+    chunks = [[]]
+    filled = 0.0
+    for seg in segments_to_keep:
+        start, end = seg['start'], seg['end']
+        while end - start > CHUNK_MIN_PIECE:
+            room = target - filled
+            if room < CHUNK_MIN_PIECE and len(chunks) < n_chunks:
+                chunks.append([])
+                filled = 0.0
+                continue
+            # Last chunk takes whatever is left so nothing is lost to rounding, and a
+            # remainder too short to be a piece stays with the one before it
+            if end - start <= room + CHUNK_MIN_PIECE or len(chunks) == n_chunks:
+                chunks[-1].append({'start': start, 'end': end})
+                filled += end - start
+                break
+            chunks[-1].append({'start': start, 'end': start + room})
+            start += room
+            filled = target
+    return [chunk for chunk in chunks if chunk]
+
+def render_chunk(original_file, segments, chunk_path, threads):
+    """Encode one chunk of kept segments to an intermediate file"""
+    # Segments are opened seeked so a worker only decodes what it keeps
+    inputs, filter_parts = build_cut_graph(original_file, segments, f"{chunk_path}.txt", 'outv', 'outa')
+    
+    encoder = get_encoder_settings(quality='high')
+    cmd = [
+        'ffmpeg', '-y', *inputs,
+        '-filter_complex', ';'.join(filter_parts),
+        '-map', '[outv]', '-map', '[outa]',
+        # Chunks share the CPU, so the per-chunk thread count replaces the calibrated one
+        *encoder_args({**encoder, 'threads': str(threads)}),
+        '-c:a', 'pcm_s16le', chunk_path
+    ]
+    run_ffmpeg(cmd)
+
+def parallel_render(original_file, segments_to_keep, output_file, session_folder, workers):
+    """Encode the cut in parallel chunks and join them, return False on failure"""
+    total = sum(seg['end'] - seg['start'] for seg in segments_to_keep)
+    n_chunks = max(1, min(workers, int(total // app.config['EXPORT_MIN_CHUNK_SECONDS'])))
+    chunks = split_into_chunks(segments_to_keep, n_chunks)
+    threads = max(1, (os.cpu_count() or 1) // len(chunks))
+    
+    chunks_folder = os.path.join(session_folder, "parallel_render")
+    os.makedirs(chunks_folder, exist_ok=True)
+    try:
+        chunk_paths = [os.path.join(chunks_folder, f"chunk_{i:04d}.mkv") for i in range(len(chunks))]
+        job_id = getattr(progress_context, 'job_id', None)
+        if job_id:
+            update_job(job_id, stage=f"encoding {len(chunks)} chunks in parallel")
+        reporters = chunk_progress_reporters(job_id, [
+            sum(piece['end'] - piece['start'] for piece in chunk) for chunk in chunks
+        ])
+        with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+            futures = [
+                pool.submit(run_with_progress, job_id, report, render_chunk, original_file, chunk, path, threads)
+                for chunk, path, report in zip(chunks, chunk_paths, reporters)
+            ]
+            for future in futures:
+                future.result()
+        
+        list_path = os.path.join(chunks_folder, "concat.txt")
+        with open(list_path, 'w') as f:
+            for path in chunk_paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        
+        run_ffmpeg([
+            'ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-c:v', 'copy', '-c:a', 'aac', *faststart_args(output_file), output_file
+        ], total, stage='joining')
+    except Exception as e:
+        print(f"Parallel render failed, falling back to single process: {e}")
+        return False
+    finally:
+        shutil.rmtree(chunks_folder, ignore_errors=True)
+    
+    print(f"Parallel render: {len(chunks)} chunks, {threads} threads each")
+    return True
+
+def preview_cache_db():
+    """Open the preview cache index, creating the tables on first use"""
+    conn = sqlite3.connect(app.config['PREVIEW_CACHE_DB'], timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS entries ("
+        "key TEXT PRIMARY KEY, session_id TEXT, path TEXT, size INTEGER, last_used REAL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (session_id, last_used)")
+    conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER)")
+    return conn
+
+def preview_cache_key(*parts):
+    """Stable content key for a cache entry"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+def _bump_stat(conn, name):
+    conn.execute(
+        "INSERT INTO stats (name, value) VALUES (?, 1) "
+        "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,)
+    )
+
+def preview_cache_get(key):
+    """Return the file path for a cached entry and mark it used, or None"""
+    with preview_cache_db() as conn:
+        row = conn.execute("SELECT path FROM entries WHERE key = ?", (key,)).fetchone()
+        if row and os.path.exists(os.path.join(app.config['PROCESSED_FOLDER'], row[0])):
+            conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            _bump_stat(conn, 'hits')
+            return os.path.join(app.config['PROCESSED_FOLDER'], row[0])
+        if row:
+            # File was removed behind our back
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        _bump_stat(conn, 'misses')
+    return None
+
+def path_size(path):
+    """Size of a file, or of all files under a folder"""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(folder, name))
+        for folder, _, names in os.walk(path) for name in names
+    )
+
+def preview_cache_put(key, session_id, file_path):
+    """Register a rendered file (or folder) and evict old entries over budget"""
+    rel_path = os.path.relpath(file_path, app.config['PROCESSED_FOLDER'])
+    with preview_cache_db() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, session_id, path, size, last_used) VALUES (?, ?, ?, ?, ?)",
+            (key, session_id, rel_path, path_size(file_path), time.time())
+        )
+        evict_preview_cache(conn, session_id)
+
+def evict_preview_cache(conn, session_id):
+    """Drop least recently used entries until the session and global budgets hold"""
+    cutoff = time.time() - app.config['PREVIEW_CACHE_MIN_AGE']
+    budgets = [
+        ("WHERE session_id = ?", (session_id,), app.config['PREVIEW_CACHE_MAX_SESSION_BYTES']),
+        ("", (), app.config['PREVIEW_CACHE_MAX_BYTES'])
+    ]
+    for where, params, max_bytes in budgets:
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM entries {where}", params).fetchone()[0]
+        if total <= max_bytes:
+            continue
+        candidates = conn.execute(
+            f"SELECT key, path, size, last_used FROM entries {where} ORDER BY last_used", params
+        ).fetchall()
+        for key, path, size, last_used in candidates:
+            if total <= max_bytes or last_used > cutoff:
+                break
+            full_path = os.path.join(app.config['PROCESSED_FOLDER'], path)
+            if os.path.isdir(full_path):
+                shutil.rmtree(full_path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(full_path)
+                except FileNotFoundError:
+                    pass
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            _bump_stat(conn, 'evictions')
+            total -= size
+
+def preview_cache_forget(session_id=None):
+    """Remove index entries for one session, or all sessions"""
+    with preview_cache_db() as conn:
+        if session_id is None:
+            conn.execute("DELETE FROM entries")
+        else:
+            conn.execute("DELETE FROM entries WHERE session_id = ?", (session_id,))
+
+def preview_cache_stats():
+    with preview_cache_db() as conn:
+        stats = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+    return {
+        'hits': stats.get('hits', 0),
+        'misses': stats.get('misses', 0),
+        'evictions': stats.get('evictions', 0),
+        'entries': entries,
+        'bytes': total
+    }
+
+def get_zoom_params(zoom):
+    """Return (zoom_level, focus_x, focus_y) for a zoom event"""
+    zoom_level = 2.0  # Default fallback
+    if 'endZoomLevel' in zoom and zoom['endZoomLevel'] is not None:
+        # Use exactly the zoom level recorded by the user
+        zoom_level = float(zoom['endZoomLevel'])
+    
+    # Get focus point
+    x, y = 0.5, 0.5  # Default center position
+    focus_point = zoom.get('focusPoint', {})
+    if isinstance(focus_point, dict):
+        if 'x' in focus_point and focus_point['x'] is not None:
+            x = min(1.0, max(0.0, float(focus_point['x'])))
+        if 'y' in focus_point and focus_point['y'] is not None:
+            y = min(1.0, max(0.0, float(focus_point['y'])))
+    
+    return zoom_level, x, y
+
+# Incremental preview
+# The preview is a concatenation of independently encoded chunks, one per kept
+# segment or zoom span. Chunks are keyed by their source range and render
+# parameters, so an edit only encodes the chunks it actually touched. Chunks
+# carry PCM audio and the AAC track is encoded once at assembly, which keeps
+# chunk joins gapless.
+PREVIEW_WIDTH = 480
+
+def plan_preview_chunks(segments_to_keep, zoom_spans):
+    """Split kept segments at zoom span boundaries into (start, end, zoom) source chunks"""
+    # Zoom spans are on the cut timeline (see plan_zoom_spans), the same ones the
+    # export renders, and are mapped back into each segment's source range
+    chunks = []
+    timeline_start = 0.0
+    for seg in segments_to_keep:
+        timeline_end = timeline_start + seg['end'] - seg['start']
+        cuts = {seg['start'], seg['end']}
+        for start, end, *_ in zoom_spans:
+            for t in (start, end):
+                if timeline_start < t < timeline_end:
+                    cuts.add(seg['start'] + t - timeline_start)
+        points = sorted(cuts)
+        for start, end in zip(points, points[1:]):
+            mid = timeline_start + (start + end) / 2 - seg['start']
+            zoom = next(((level, x, y) for z_start, z_end, level, x, y in zoom_spans if z_start <= mid < z_end), None)
+            chunks.append((start, end, zoom))
+        timeline_start = timeline_end
+    return chunks
+
+def preview_chunk_key(original_file, start, end, zoom, encoder):
+    """Stable key for a preview chunk"""
+    return preview_cache_key('chunk', {
+        'source': os.path.basename(original_file),
+        'start': round(start, 3),
+        'end': round(end, 3),
+        'zoom': zoom,
+        'width': PREVIEW_WIDTH,
+        'encoder': encoder
+    })
+
+def render_preview_chunk(original_file, start, end, zoom, encoder, chunk_path):
+    """Encode a single preview chunk"""
+    filters = []
+    if zoom:
+        zoom_level, x, y = zoom
+        scale_factor = 1.0 / zoom_level
+        filters.append(f"crop=iw*{scale_factor}:ih*{scale_factor}:(iw-iw*{scale_factor})*{x}:(ih-ih*{scale_factor})*{y}")
+    filters.append(f"scale={PREVIEW_WIDTH}:-2,setsar=1:1")
+    
+    cmd = [
+        'ffmpeg', '-y', '-ss', ffmpeg_time(start), '-i', original_file, '-t', ffmpeg_time(end - start),
+        '-vf', ','.join(filters),
+        *encoder_args(encoder), '-g', '9999'
+    ]
+    
+    # Write to a temporary name so a failed encode never looks like a cached chunk
+    tmp_path = f"{chunk_path}.{uuid.uuid4().hex}.mkv"
+    cmd.extend(['-c:a', 'pcm_s16le', '-ar', '48000', '-ac', '2', tmp_path])
+    run_ffmpeg(cmd)
+    os.replace(tmp_path, chunk_path)
+
+def render_incremental_preview(session_id, original_file, segments_to_keep, zoom_spans, session_folder, preview_file):
+    """Assemble a preview from cached chunks, return (chunks_total, chunks_rendered)"""
+    encoder = get_encoder_settings(quality='preview')
+    chunks_folder = os.path.join(session_folder, "preview_chunks")
+    os.makedirs(chunks_folder, exist_ok=True)
+    
+    chunk_paths = []
+    missing = []
+    for start, end, zoom in plan_preview_chunks(segments_to_keep, zoom_spans):
+        key = preview_chunk_key(original_file, start, end, zoom, encoder)
+        chunk_path = os.path.join(chunks_folder, f"{key}.mkv")
+        chunk_paths.append(chunk_path)
+        hit = preview_cache_get(f"{session_id}:{key}") is not None
+        count_cache('preview_chunk', hit)
+        if not hit:
+            missing.append((start, end, zoom, chunk_path, key))
+    
+    # Only the chunks this edit touched need encoding
+    if missing:
+        job_id = getattr(progress_context, 'job_id', None)
+        if job_id:
+            update_job(job_id, stage=f"encoding {len(missing)} of {len(chunk_paths)} preview chunks")
+        reporters = chunk_progress_reporters(job_id, [end - start for start, end, zoom, path, key in missing])
+        with ThreadPoolExecutor(max_workers=app.config['EXPORT_WORKERS']) as pool:
+            futures = [
+                pool.submit(run_with_progress, job_id, report, render_preview_chunk, original_file, start, end, zoom, encoder, path)
+                for (start, end, zoom, path, key), report in zip(missing, reporters)
+            ]
+            for future in futures:
+                future.result()
+        for start, end, zoom, path, key in missing:
+            preview_cache_put(f"{session_id}:{key}", session_id, path)
+    
+    list_path = os.path.join(chunks_folder, f"concat_{uuid.uuid4().hex}.txt")
+    try:
+        with open(list_path, 'w') as f:
+            for path in chunk_paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        
+        run_ffmpeg([
+            'ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-c:v', 'copy', '-c:a', 'aac', '-b:a', '32k', *faststart_args(preview_file), preview_file
+        ], sum(seg['end'] - seg['start'] for seg in segments_to_keep), stage='joining')
+    finally:
+        os.remove(list_path)
+    
+    return len(chunk_paths), len(missing)
+
+def build_segment_inputs(original_file, segments_to_keep):
+    """FFmpeg input arguments opening each kept segment as its own seeked input"""
+    # -ss/-t before -i seeks the demuxer to the nearest keyframe and stops reading
+    # at the segment end, so decode work follows the kept duration rather than
+    # running from the start of the file for every trim
+    args = []
+    for segment in segments_to_keep:
+        args.extend([
+            '-ss', ffmpeg_time(segment['start']),
+            '-t', ffmpeg_time(segment['end'] - segment['start']),
+            '-i', original_file
+        ])
+    return args
+
+def build_cut_graph(original_file, segments_to_keep, list_path, video_label='vcut', audio_label='acut', first_input=0):
+    """Inputs and filter graph lines joining the kept segments into video_label and audio_label"""
+    n = len(segments_to_keep)
+    lines = []
+    if n <= app.config['SEGMENT_INPUTS_MAX']:
+        inputs = build_segment_inputs(original_file, segments_to_keep)
+        if video_label:
+            lines.extend(f"[{first_input + i}:v]setpts=PTS-STARTPTS[v{i}]" for i in range(n))
+            lines.append(f"{''.join(f'[v{i}]' for i in range(n))}concat=n={n}:v=1:a=0[{video_label}]")
+        if audio_label:
+            lines.extend(f"[{first_input + i}:a]asetpts=PTS-STARTPTS[a{i}]" for i in range(n))
+            lines.append(f"{''.join(f'[a{i}]' for i in range(n))}concat=n={n}:v=0:a=1[{audio_label}]")
+        return inputs, lines
+    
+    # Hundreds of inputs would each hold a demuxer, decoder and its threads open at
+    # once. Instead one concat demuxer walks the kept ranges in order: it starts each
+    # range at the keyframe before its inpoint and concatdec_select drops the frames
+    # outside the range. Audio frames straddling an edge are padded or trimmed to
+    # their timestamps so the audio stays on the video's clock.
+    with open(list_path, 'w') as f:
+        for segment in segments_to_keep:
+            f.write(f"file '{os.path.abspath(original_file)}'\n")
+            f.write(f"inpoint {ffmpeg_time(segment['start'])}\n")
+            f.write(f"outpoint {ffmpeg_time(segment['end'])}\n")
+    inputs = ['-f', 'concat', '-safe', '0', '-segment_time_metadata', '1', '-i', list_path]
+    if video_label:
+        lines.append(f"[{first_input}:v]select=concatdec_select,setpts=PTS-STARTPTS[{video_label}]")
+    if audio_label:
+        lines.append(f"[{first_input}:a]aselect=concatdec_select,aresample=async=1:first_pts=0[{audio_label}]")
+    return inputs, lines
+
+def map_to_timeline(segment_timeline, timeline_starts, orig_time):
+    """Convert an original time to its position on the cut timeline, or None if cut"""
+    # Last kept segment starting at or before orig_time
+    i = bisect.bisect_right(timeline_starts, orig_time) - 1
+    if i < 0 or orig_time > segment_timeline[i]['original_end']:
+        return None
+    seg = segment_timeline[i]
+    return seg['timeline_start'] + (orig_time - seg['original_start'])
+
+def plan_zoom_spans(segments_to_keep, zoom_events, video_duration):
+    """Map sorted, non-overlapping zoom events to (start, end, level, x, y) spans on the cut timeline"""
+    # Calculate timing adjustments for zooms after cuts
+    segment_timeline = []
+    running_time = 0
+    
+    for segment in segments_to_keep:
+        segment_duration = segment['end'] - segment['start']
+        segment_timeline.append({
+            'original_start': segment['start'],
+            'original_end': segment['end'],
+            'timeline_start': running_time,
+            'timeline_end': running_time + segment_duration
         })
+        running_time += segment_duration
+    
+    # Sorted segment starts for bisect lookups of original -> timeline time
+    timeline_starts = [seg['original_start'] for seg in segment_timeline]
+    
+    current_time = 0
+    zoom_spans = []
+    
+    # Process each zoom event in order
+    for zoom in zoom_events:
+        # Get original start and end times from the zoom event
+        orig_start_time = max(0, float(zoom.get('startTime', 0)))
+        orig_end_time = min(video_duration, float(zoom.get('endTime', video_duration)))
+        
+        # Find where these times fall in the new timeline after cuts
+        adj_start_time = map_to_timeline(segment_timeline, timeline_starts, orig_start_time)
+        adj_end_time = map_to_timeline(segment_timeline, timeline_starts, orig_end_time)
+        
+        # Skip this zoom if it can't be mapped to the new timeline
+        if adj_start_time is None or adj_end_time is None or adj_start_time >= adj_end_time:
+            continue
+        
+        # Make sure zooms don't overlap
+        adj_start_time = max(adj_start_time, current_time)
+        if adj_start_time >= adj_end_time:
+            continue
+        
+        # Get zoom level and focus point exactly as recorded
+        zoom_level, x, y = get_zoom_params(zoom)
+        zoom_spans.append((adj_start_time, adj_end_time, zoom_level, x, y))
+        
+        # Update current position
+        current_time = adj_end_time
+    
+    return zoom_spans
+
+def build_zoom_filter(zoom_spans, video):
+    """Build a single zoompan filter for (start, end, level, x, y) timeline spans"""
+    # Piecewise expressions over the input timestamp, 1x zoom outside every span
+    zoom_expr = '1'
+    x_expr = '0'
+    y_expr = '0'
+    for start, end, level, x, y in reversed(zoom_spans):
+        within = f"between(it,{start},{end})"
+        zoom_expr = f"if({within},{level},{zoom_expr})"
+        x_expr = f"if({within},{x},{x_expr})"
+        y_expr = f"if({within},{y},{y_expr})"
+    
+    width = video.get('width', 1920)
+    height = video.get('height', 1080)
+    fps = video.get('r_frame_rate', '30/1')
+    
+    # zoompan stamps output frames as frame_count / fps and drops the input
+    # timestamps, so variable frame rate input (or an r_frame_rate that isn't the
+    # real rate, common for screen and browser recordings) would drift against the
+    # audio. The fps filter first makes the video constant rate at exactly that
+    # rate by duplicating or dropping frames by timestamp; d=1 then gives one
+    # output frame per input frame and the length is unchanged.
+    return (
+        f"fps={fps},"
+        f"zoompan=z='{zoom_expr}'"
+        f":x='(iw-iw/zoom)*({x_expr})'"
+        f":y='(ih-ih/zoom)*({y_expr})'"
+        f":d=1:s={width}x{height}:fps={fps},setsar=1:1"
+    )
+
+# Streaming preview
+# Renders the preview as short MPEG-TS segments with a growing EVENT playlist
+# under hls_<key>/ in the session folder. The request returns once the first
+# segment is written and ffmpeg keeps going in the background. A session has at
+# most one render running, a new edit stops the previous one, and finished
+# folders are registered with the preview cache so they count against its budgets.
+# The jobs of the requests served by a render follow its progress and are
+# finished by the watcher thread when ffmpeg exits, not when the request returns.
+hls_processes = {}  # session folder -> (preview key, ffmpeg process, job ids)
+hls_processes_lock = threading.Lock()
+
+def watch_hls_render(session_id, session_folder, preview_key, hls_dir, proc, job_ids, duration):
+    """Publish an HLS render's progress, then register its folder with the preview cache or remove it"""
+    def report(current, fps=None, speed=None):
+        with hls_processes_lock:
+            following = list(job_ids)
+        for job_id in following:
+            publish_progress(job_id, current, duration, fps=fps, speed=speed)
+    read_ffmpeg_progress(proc.stdout, report)
+    proc.wait()
+    
+    with hls_processes_lock:
+        following = list(job_ids)
+        job_ids.clear()
+    for job_id in following:
+        if proc.returncode == 0:
+            update_job(job_id, status='completed', stage=None, finished_at=time.time())
+        else:
+            update_job(job_id, status='failed', stage=None, error=f"ffmpeg exited with code {proc.returncode}",
+                       finished_at=time.time())
+    
+    with hls_processes_lock:
+        current = hls_processes.get(session_folder)
+        if current and current[1] is proc:
+            del hls_processes[session_folder]
+        elif current and current[0] == preview_key:
+            # A newer render of the same edit owns the folder now
+            return
+        if proc.returncode == 0:
+            preview_cache_put(f"{session_id}:hls:{preview_key}", session_id, hls_dir)
+        else:
+            shutil.rmtree(hls_dir, ignore_errors=True)
+
+def stop_hls_preview(session_folder):
+    """Stop the session's running HLS render, if any"""
+    with hls_processes_lock:
+        current = hls_processes.get(session_folder)
+        if current:
+            current[1].terminate()
+
+def start_hls_preview(ffmpeg_cmd, session_id, session_folder, preview_key, job_id=None, duration=None):
+    """Start (or reuse) an HLS render and return (playlist path relative to the session, following)
     
-    # Save transcript data
-    transcript_path = os.path.join(session_folder, "transcript.json")
-    with open(transcript_path, 'w') as f:
-        json.dump(transcript_data, f)
+    following is True when job_id was handed to the running render, which then
+    finishes the job when ffmpeg exits.
+    """
+    hls_dirname = f"hls_{preview_key[:16]}"
+    hls_dir = os.path.join(session_folder, hls_dirname)
+    playlist = os.path.join(hls_dir, "index.m3u8")
+    playlist_rel = f"{hls_dirname}/index.m3u8"
+    
+    with hls_processes_lock:
+        current = hls_processes.get(session_folder)
+        if current and current[0] == preview_key:
+            proc, job_ids = current[1], current[2]
+        else:
+            # The edit changed, the old render's output won't be watched any more
+            if current:
+                current[1].terminate()
+            
+            # A finished playlist for this exact edit can be served as is
+            if preview_cache_get(f"{session_id}:hls:{preview_key}"):
+                return playlist_rel, False
+            shutil.rmtree(hls_dir, ignore_errors=True)
+            os.makedirs(hls_dir, exist_ok=True)
+            
+            segment_seconds = app.config['HLS_SEGMENT_SECONDS']
+            cmd = list(ffmpeg_cmd) + [
+                # Keyframe at every segment boundary so segments cut cleanly
+                '-force_key_frames', f"expr:gte(t,n_forced*{segment_seconds})",
+                '-f', 'hls',
+                '-hls_time', str(segment_seconds),
+                '-hls_playlist_type', 'event',
+                '-hls_segment_filename', os.path.join(hls_dir, 'seg_%05d.ts'),
+                playlist
+            ]
+            proc = subprocess.Popen(
+                ffmpeg_progress_args(cmd), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+            )
+            job_ids = []
+            hls_processes[session_folder] = (preview_key, proc, job_ids)
+            threading.Thread(
+                target=watch_hls_render,
+                args=(session_id, session_folder, preview_key, hls_dir, proc, job_ids, duration),
+                daemon=True
+            ).start()
+        
+        # A render that already exited has finished its jobs, so don't hand it a new one
+        following = job_id is not None and proc.poll() is None
+        if following:
+            job_ids.append(job_id)
+            update_job(job_id, stage='rendering_preview')
+    
+    try:
+        # Wait for ffmpeg to publish the first segment
+        deadline = time.time() + app.config['HLS_START_TIMEOUT']
+        while time.time() < deadline:
+            if os.path.exists(playlist):
+                with open(playlist, 'r') as f:
+                    if '.ts' in f.read():
+                        return playlist_rel, following
+            if proc.poll() is not None and proc.returncode != 0:
+                raise RuntimeError(f"ffmpeg exited with code {proc.returncode}")
+            time.sleep(0.1)
+        
+        raise RuntimeError("Timed out waiting for the first preview segment")
+    except Exception:
+        # The request falls back to a full render and finishes its own job
+        with hls_processes_lock:
+            if job_id in job_ids:
+                job_ids.remove(job_id)
+        raise
+
+# Selection normalization
+# Selections from the editor can overlap, nest or sit back to back, and word
+# level cuts leave kept slivers a frame or two long. Each cut edge is snapped to
+# the frame grid and then to the nearest audio zero crossing within the same
+# frame interval (so the frames kept don't change), cuts are merged into
+# disjoint intervals and kept pieces shorter than SELECTION_MIN_KEEP are cut.
+SELECTION_MERGE_GAP = 1e-3  # Cuts closer than this are treated as touching
+ZERO_CROSSING_WINDOW = 0.005  # Search window before an edge when the frame rate is unknown
+
+def write_sign_bits(samples, path):
+    """Store the sign of every PCM sample as a packed bitmap"""
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    np.packbits(samples >= 0).tofile(tmp)
+    os.replace(tmp, path)
+
+def load_sign_bits(session_folder):
+    """Memory-map a session's sample sign bitmap, None if there isn't one"""
+    path = os.path.join(session_folder, "audio_signs.bin")
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    return np.memmap(path, dtype=np.uint8, mode='r')
+
+def nearest_zero_crossing(signs, t, lower):
+    """Time of the zero crossing nearest t within (lower, t], or t if there is none"""
+    first = max(1, int(np.floor(lower * SAMPLE_RATE)) + 1)
+    last = min(len(signs) * 8 - 1, int(np.floor(t * SAMPLE_RATE)))
+    if last < first:
+        return t
+    # Only unpack the bytes covering samples first - 1 .. last
+    byte_start = (first - 1) // 8
+    bits = np.unpackbits(signs[byte_start:last // 8 + 1])
+    window = bits[first - 1 - byte_start * 8:last + 1 - byte_start * 8]
+    crossings = np.flatnonzero(np.diff(window)) + first
+    if not len(crossings):
+        return t
+    return float(crossings[np.argmin(np.abs(crossings - t * SAMPLE_RATE))]) / SAMPLE_RATE
+
+def snap_cut_edge(t, fps, signs):
+    """Snap a cut edge to the frame grid, then to a zero crossing keeping the same frames"""
+    if fps:
+        t = round(t * fps) / fps
+        lower = t - 1 / fps
+    else:
+        lower = t - ZERO_CROSSING_WINDOW
+    if signs is None:
+        return t
+    return nearest_zero_crossing(signs, t, lower)
+
+def normalize_selections(selections, duration, fps=None, signs=None, min_keep=0.0):
+    """Turn raw selections into sorted, disjoint, snapped cuts without kept slivers"""
+    cuts = []
+    for selection in selections:
+        start = max(0.0, float(selection['start']))
+        end = min(duration, float(selection['end']))
+        # The very start and end of the file are already exact
+        if start > 0:
+            start = snap_cut_edge(start, fps, signs)
+        if end < duration:
+            end = snap_cut_edge(end, fps, signs)
+        if end > start:
+            cuts.append([start, end])
+    cuts.sort()
+    
+    merged = []
+    for start, end in cuts:
+        # Overlapping, touching, or only a sliver apart (from the file start too)
+        kept_before = start - (merged[-1][1] if merged else 0.0)
+        if kept_before <= SELECTION_MERGE_GAP or kept_before < min_keep:
+            if merged:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([0.0, end])
+        else:
+            merged.append([start, end])
+    if merged and duration - merged[-1][1] < min_keep:
+        merged[-1][1] = duration
+    
+    return [{'start': round(start, 6), 'end': round(end, 6)} for start, end in merged]
+
+@app.route('/silence/<session_id>', methods=['POST'])
+def recompute_silence(session_id):
+    """Re-detect silences with new settings from the cached energy envelope"""
+    data = request.json or {}
+    session_folder = os.path.join(app.config['PROCESSED_FOLDER'], session_id)
+    envelope_path = os.path.join(session_folder, "energy.npy")
+    transcript = load_transcript(session_folder)
+    if transcript is None or not os.path.exists(envelope_path):
+        return jsonify({'success': False, 'error': 'Session files not found'}), 404
+    
+    try:
+        threshold_db = float(data.get('threshold_db', app.config['SILENCE_THRESHOLD_DB']))
+        min_duration = float(data.get('min_duration', app.config['SILENCE_MIN_DURATION']))
+        padding = float(data.get('padding', app.config['SILENCE_PADDING']))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Invalid silence settings'}), 400
+    
+    words = [entry for entry in transcript_entries(transcript, 0, len(transcript['start'])) if not entry['is_silence']]
+    envelope = np.load(envelope_path)
+    
+    silences = find_silences(envelope, threshold_db, min_duration, padding)
+    transcript_data = build_transcript(words, silences)
+    save_transcript(os.path.join(session_folder, "transcript.npz"), pack_transcript(transcript_data))
     
     return jsonify({
         'success': True,
         'session_id': session_id,
-        'filename': filename,
+        'silences': len(silences),
         'transcript': transcript_data
     })
 
+@app.route('/transcript/<session_id>')
+def get_transcript(session_id):
+    """Return a page (offset/limit) or a time window (start/end) of a transcript"""
+    transcript = load_transcript(os.path.join(app.config['PROCESSED_FOLDER'], session_id))
+    if transcript is None:
+        return jsonify({'success': False, 'error': 'Transcript not found'}), 404
+    
+    total = len(transcript['start'])
+    try:
+        if 'start' in request.args or 'end' in request.args:
+            first, last = transcript_window(
+                transcript,
+                float(request.args.get('start', 0)),
+                float(request.args.get('end', 'inf'))
+            )
+        else:
+            first = max(0, int(request.args.get('offset', 0)))
+            last = first + int(request.args.get('limit', total))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid range'}), 400
+    first, last = min(first, total), min(max(first, last), total)
+    
+    response = {
+        'success': True,
+        'session_id': session_id,
+        'total': total,
+        'offset': first,
+        'count': last - first
+    }
+    # Columns are much smaller on the wire than one object per word
+    if request.args.get('format') == 'columns':
+        response['columns'] = transcript_columns(transcript, first, last)
+    else:
+        response['transcript'] = transcript_entries(transcript, first, last)
+    return jsonify(response)
+
+@app.route('/peaks/<session_id>')
+def get_peaks_index(session_id):
+    """Describe the waveform peaks levels of a session"""
+    peaks_index = os.path.join(app.config['PROCESSED_FOLDER'], session_id, "peaks.json")
+    if not os.path.exists(peaks_index):
+        return jsonify({'success': False, 'error': 'Peaks not found'}), 404
+    with open(peaks_index, 'r') as f:
+        return jsonify({'success': True, **json.load(f)})
+
+@app.route('/peaks/<session_id>/<int:level>')
+def get_peaks(session_id, level):
+    """Return the raw int8 min/max pairs of one peaks level between start and end seconds"""
+    session_folder = os.path.join(app.config['PROCESSED_FOLDER'], session_id)
+    peaks_index = os.path.join(session_folder, "peaks.json")
+    if not os.path.exists(peaks_index):
+        return jsonify({'success': False, 'error': 'Peaks not found'}), 404
+    with open(peaks_index, 'r') as f:
+        index = json.load(f)
+    if level >= len(index['levels']):
+        return jsonify({'success': False, 'error': 'Invalid level'}), 400
+    
+    info = index['levels'][level]
+    peaks_per_second = index['sample_rate'] / info['samples_per_peak']
+    try:
+        start = float(request.args.get('start', 0))
+        end = float(request.args.get('end', info['count'] / peaks_per_second))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid time range'}), 400
+    first = min(info['count'], max(0, int(start * peaks_per_second)))
+    last = min(info['count'], max(first, int(np.ceil(end * peaks_per_second))))
+    
+    with open(os.path.join(session_folder, "peaks.bin"), 'rb') as f:
+        f.seek(info['offset'] + 2 * first)
+        data = f.read(2 * (last - first))
+    return Response(data, mimetype='application/octet-stream', headers={
+        'X-Peaks-First': str(first),
+        'X-Peaks-Samples-Per-Peak': str(info['samples_per_peak']),
+        'Cache-Control': 'no-cache'
+    })
+
+@app.route('/thumbnails/<session_id>')
+def get_thumbnails(session_id):
+    """List the sprite tiles of the thumbnails between start and end seconds"""
+    thumbs_folder = os.path.join(app.config['PROCESSED_FOLDER'], session_id, "thumbnails")
+    thumbs_index = os.path.join(thumbs_folder, "thumbnails.json")
+    if not os.path.exists(thumbs_index):
+        return jsonify({'success': False, 'error': 'Thumbnails not found'}), 404
+    with open(thumbs_index, 'r') as f:
+        index = json.load(f)
+    times = np.fromfile(os.path.join(thumbs_folder, "thumbnails.bin"), dtype=np.float32)
+    
+    try:
+        start = float(request.args.get('start', 0))
+        end = float(request.args.get('end', 'inf'))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid time range'}), 400
+    # Include the thumbnail showing at start, not just those taken after it
+    first = max(0, int(np.searchsorted(times, start, side='right')) - 1)
+    last = int(np.searchsorted(times, end, side='right'))
+    
+    per_sheet = index['columns'] * index['rows']
+    thumbnails = []
+    for i in range(first, min(last, len(index['sheets']) * per_sheet)):
+        cell = i % per_sheet
+        thumbnails.append({
+            'index': i,
+            'time': round(float(times[i]), 3),
+            'sheet': f"thumbnails/{index['sheets'][i // per_sheet]}",
+            'x': (cell % index['columns']) * index['width'],
+            'y': (cell // index['columns']) * index['height']
+        })
+    return jsonify({'success': True, **index, 'thumbnails': thumbnails})
+
 @app.route('/edit', methods=['POST'])
 def edit_video():
     data = request.json
@@ -254,6 +2912,7 @@ def edit_video():
     selections = data.get('selections', [])  # Text selections to remove
     zoom_events = data.get('zoom_events', [])  # Zoom events to apply
     preview_only = data.get('preview_only', False)  # Whether to only generate a preview
+    export_mode = data.get('export_mode', app.config['EXPORT_MODE'])  # Export engine for full quality renders
     
     if not session_id or not filename: # Allow videos with no selections but with zoom events
         return jsonify({'error': 'Missing required data'}), 400
@@ -263,22 +2922,38 @@ def edit_video():
     
     session_folder = os.path.join(app.config['PROCESSED_FOLDER'], session_id)
     original_file = os.path.join(session_folder, filename)
-    transcript_path = os.path.join(session_folder, "transcript.json")
     
     # Check if files exist
-    if not os.path.exists(original_file) or not os.path.exists(transcript_path):
+    if not os.path.exists(original_file):
         return jsonify({'error': 'Session files not found'}), 404
     
-    # Load transcript data
-    with open(transcript_path, 'r') as f:
-        transcript_data = json.load(f)
+    # Track this render as a job so clients can follow its progress,
+    # finish_request_job marks it done when the response goes out
+    job_id = create_job(session_id, filename, status='processing', job_id=data.get('job_id'),
+                        kind='preview' if preview_only else 'edit')
+    g.job_id = job_id
+    progress_context.job_id = job_id
+    start_timing('preview' if preview_only else 'edit')
+    
+    # Duration and stream parameters come from the manifest written at upload
+    # rather than a fresh ffprobe
+    with span('manifest'):
+        manifest = load_media_manifest(session_folder, original_file)
+    video_duration = manifest['duration']
     
     # Create a list of segments to keep (inverse of what to cut)
     segments_to_keep = []
     current_start = 0
     
-    # Sort selections by start time to process in order
-    sorted_selections = sorted(selections, key=lambda x: x['start'])
+    # Merge overlapping selections into sorted, disjoint cuts snapped to frames
+    # and zero crossings, so no footage repeats and no slivers are rendered
+    with span('normalize_selections'):
+        sorted_selections = normalize_selections(
+            selections, video_duration,
+            fps=(manifest.get('video') or {}).get('fps'),
+            signs=load_sign_bits(session_folder),
+            min_keep=app.config['SELECTION_MIN_KEEP']
+        )
     
     for selection in sorted_selections:
         # Keep segment from current_start to selection start
@@ -292,12 +2967,17 @@ def edit_video():
         current_start = selection['end']
     
     # Add final segment if needed
-    video_duration = get_video_duration(original_file)
     if current_start < video_duration:
         segments_to_keep.append({
             'start': current_start,
             'end': video_duration
         })
+    
+    if not segments_to_keep:
+        return jsonify({'error': 'Selections remove the whole video'}), 400
+        
+    # Length of the edited timeline, used for progress reporting
+    kept_duration = sum(segment['end'] - segment['start'] for segment in segments_to_keep)
         
     # Process zoom events
     sorted_zoom_events = sorted(zoom_events, key=lambda x: x['startTime'])
@@ -327,194 +3007,89 @@ def edit_video():
     with open(zoom_events_path, 'w') as f:
         json.dump(sorted_zoom_events, f, indent=2)
     
+    # Zoom spans on the cut timeline, shared by every preview path and the export
+    # so they all drop a zoom whose start or end was cut
+    zoom_spans = plan_zoom_spans(segments_to_keep, sorted_zoom_events, video_duration)
+    
     # Create temporary file for filter complex script
     filter_file = os.path.join(session_folder, "filter_complex.txt")
-    with open(filter_file, 'w') as f:
-        # First create segment streams
-        for i, segment in enumerate(segments_to_keep):
-            f.write(f"[0:v]trim={segment['start']}:{segment['end']},setpts=PTS-STARTPTS[v{i}];\n")
-            f.write(f"[0:a]atrim={segment['start']}:{segment['end']},asetpts=PTS-STARTPTS[a{i}];\n")
-        
-        # Get streams arrays for audio concatenation
-        v_stream = ''.join(f'[v{i}]' for i in range(len(segments_to_keep)))
-        a_stream = ''.join(f'[a{i}]' for i in range(len(segments_to_keep)))
-        
-        # First concat video segments
-        f.write(f"{v_stream}concat=n={len(segments_to_keep)}:v=1:a=0[vconcated];\n")
-        
-        # If we have zoom events, process them one by one
-        if zoom_events and sorted_zoom_events:
-            # Calculate how many splits we need (one for each zoom, plus gaps between zooms)
-            # Maximum number of segments is 2n+1 where n is number of zooms
-            max_segments = len(sorted_zoom_events) * 2 + 1
-            
-            # Generate split outputs
-            split_outputs = [f"[split_{i}]" for i in range(max_segments)]
-            f.write(f"[vconcated]split={max_segments}{(''.join(split_outputs))};\n")
-            
-            # For tracking which parts of the video have been processed
-            processed_segments = []
-            
-            # For naming the video stream segments
-            segment_counter = 0
-            split_counter = 0
-            
-            current_time = 0
-            
-            # Calculate timing adjustments for zooms after cuts
-            segment_timeline = []
-            running_time = 0
-            
-            for segment in segments_to_keep:
-                segment_duration = segment['end'] - segment['start']
-                segment_timeline.append({
-                    'original_start': segment['start'],
-                    'original_end': segment['end'],
-                    'timeline_start': running_time,
-                    'timeline_end': running_time + segment_duration
-                })
-                running_time += segment_duration
-            
-            total_duration = running_time
-            
-            # Process each zoom event in order
-            for zoom_idx, zoom in enumerate(sorted_zoom_events):
-                # Get original start and end times from the zoom event
-                orig_start_time = max(0, float(zoom.get('startTime', 0)))
-                orig_end_time = min(video_duration, float(zoom.get('endTime', video_duration)))
-                
-                # Find where these times fall in the new timeline after cuts
-                adj_start_time = None
-                adj_end_time = None
-                
-                # Convert original times to timeline times
-                for seg in segment_timeline:
-                    # Check if zoom start is in this segment
-                    if orig_start_time >= seg['original_start'] and orig_start_time <= seg['original_end']:
-                        # Convert to the new timeline position
-                        rel_pos = (orig_start_time - seg['original_start']) / (seg['original_end'] - seg['original_start'])
-                        adj_start_time = seg['timeline_start'] + rel_pos * (seg['timeline_end'] - seg['timeline_start'])
-                    
-                    # Check if zoom end is in this segment
-                    if orig_end_time >= seg['original_start'] and orig_end_time <= seg['original_end']:
-                        # Convert to the new timeline position
-                        rel_pos = (orig_end_time - seg['original_start']) / (seg['original_end'] - seg['original_start'])
-                        adj_end_time = seg['timeline_start'] + rel_pos * (seg['timeline_end'] - seg['timeline_start'])
-                
-                # Skip this zoom if it can't be mapped to the new timeline
-                if adj_start_time is None or adj_end_time is None or adj_start_time >= adj_end_time:
-                    continue
-                
-                # Make sure zooms don't overlap
-                adj_start_time = max(adj_start_time, current_time)
-                if adj_start_time >= adj_end_time:
-                    continue
-                
-                # Get zoom level exactly as recorded
-                zoom_level = 2.0  # Default fallback
-                if 'endZoomLevel' in zoom and zoom['endZoomLevel'] is not None:
-                    # Use exactly the zoom level recorded by the user
-                    zoom_level = float(zoom['endZoomLevel'])
-                
-                # Get focus point
-                x, y = 0.5, 0.5  # Default center position
-                focus_point = zoom.get('focusPoint', {})
-                if isinstance(focus_point, dict):
-                    if 'x' in focus_point and focus_point['x'] is not None:
-                        x = min(1.0, max(0.0, float(focus_point['x'])))
-                    if 'y' in focus_point and focus_point['y'] is not None:
-                        y = min(1.0, max(0.0, float(focus_point['y'])))
-                
-                # Calculate scale and crop parameters
-                scale_factor = 1.0 / zoom_level
-                crop_width = f"iw*{scale_factor}"
-                crop_height = f"ih*{scale_factor}"
-                crop_x = f"(iw-{crop_width})*{x}"
-                crop_y = f"(ih-{crop_height})*{y}"
-                
-                # If there's a gap before this zoom, add it as a non-zoomed segment
-                if adj_start_time > current_time:
-                    f.write(f"[split_{split_counter}]trim={current_time}:{adj_start_time},setpts=PTS-STARTPTS[v_before_{segment_counter}];\n")
-                    processed_segments.append(f"[v_before_{segment_counter}]")
-                    segment_counter += 1
-                    split_counter += 1
-                
-                # Add the zoomed segment
-                zoom_stream = f"v_zoom_{segment_counter}"
-                f.write(f"[split_{split_counter}]trim={adj_start_time}:{adj_end_time},setpts=PTS-STARTPTS,")
-                f.write(f"crop={crop_width}:{crop_height}:{crop_x}:{crop_y},")
-                f.write(f"scale=iw*{zoom_level}:-1,scale=1920:1080,setsar=1:1[{zoom_stream}];\n")
-                processed_segments.append(f"[{zoom_stream}]")
-                segment_counter += 1
-                split_counter += 1
-                
-                # Update current position
-                current_time = adj_end_time
-            
-            # Add remaining video after last zoom
-            if current_time < total_duration:
-                f.write(f"[split_{split_counter}]trim={current_time}:{total_duration},setpts=PTS-STARTPTS[v_after_{segment_counter}];\n")
-                processed_segments.append(f"[v_after_{segment_counter}]")
-            
-            # Concatenate all segments if we have multiple
-            if processed_segments:
-                if len(processed_segments) > 1:
-                    segments_str = ''.join(processed_segments)
-                    f.write(f"{segments_str}concat=n={len(processed_segments)}:v=1:a=0[outv];\n")
-                else:
-                    # Just one segment, use it directly
-                    f.write(f"{processed_segments[0]}copy[outv];\n")
-            else:
-                # No segments created, just use the vconcated video directly
-                f.write(f"[vconcated]copy[outv];\n")
+    with span('filter_graph'), open(filter_file, 'w') as f:
+        # First join the kept segments, opened seeked (see build_cut_graph) so
+        # only kept ranges are decoded
+        segment_inputs, cut_lines = build_cut_graph(
+            original_file, segments_to_keep, os.path.join(session_folder, "segments_concat.txt"),
+            video_label='vconcated', audio_label='outa'
+        )
+        f.write(';\n'.join(cut_lines) + ';\n')
+        
+        # Render all zooms with one time-driven zoompan stage so the cost stays
+        # linear in frames however many zooms there are
+        if zoom_spans:
+            f.write(f"[vconcated]{build_zoom_filter(zoom_spans, manifest.get('video') or {})}[outv];\n")
         else:
-            # No zoom, just use concatenated segments
-            # No need to recreate the concatenated stream, just use it directly
+            # No zooms landed on the timeline, just use the concatenated segments directly
             f.write(f"[vconcated]copy[outv];\n")
-        
-        # Add audio stream concatenation
-        f.write(f"{a_stream}concat=n={len(segments_to_keep)}:v=0:a=1[outa]")
+    
+    # Create a unique identifier for this edit configuration, each one gets its own preview file
+    preview_key = preview_cache_key('preview', session_id, filename, sorted_selections, sorted_zoom_events)
+    cache_key = f"{session_id}:{preview_key}"
     
     # Generate filenames
-    preview_filename = f"preview_{filename}"
+    preview_filename = f"preview_{preview_key[:16]}_{filename}"
     preview_file = os.path.join(session_folder, preview_filename)
     
     if preview_only:
-        # Create a unique identifier for this edit configuration
-        selection_hash = hash(str(sorted_selections) + str(sorted_zoom_events))
-        
         # Check if we have a cached preview for this edit
-        if session_id in app.config['PREVIEW_CACHE'] and \
-           selection_hash in app.config['PREVIEW_CACHE'][session_id] and \
-           os.path.exists(os.path.join(session_folder, app.config['PREVIEW_CACHE'][session_id][selection_hash])):
+        cached_preview = preview_cache_get(cache_key)
+        count_cache('preview', cached_preview is not None)
+        if cached_preview:
             # Return cached preview file
             return jsonify({
                 'success': True,
                 'session_id': session_id,
-                'preview_file': app.config['PREVIEW_CACHE'][session_id][selection_hash],
+                'job_id': job_id,
+                'preview_file': os.path.basename(cached_preview),
                 'zoom_events_applied': len(zoom_events) > 0,
                 'cached': True
             })
         
+        # Streaming previews render the whole timeline as HLS, the player can start on the first segments
+        streaming = bool(data.get('streaming', False))
+        
+        if app.config['PREVIEW_MODE'] == 'incremental' and not streaming:
+            try:
+                with span('incremental_preview'):
+                    chunks_total, chunks_rendered = render_incremental_preview(
+                        session_id, original_file, segments_to_keep, zoom_spans,
+                        session_folder, preview_file
+                    )
+                
+                # Cache the preview
+                preview_cache_put(cache_key, session_id, preview_file)
+                
+                return jsonify({
+                    'success': True,
+                    'session_id': session_id,
+                    'job_id': job_id,
+                    'preview_file': preview_filename,
+                    'zoom_events_applied': len(zoom_events) > 0,
+                    'cached': False,
+                    'chunks_total': chunks_total,
+                    'chunks_rendered': chunks_rendered
+                })
+            except Exception as e:
+                print(f"Incremental preview failed, falling back to full render: {e}")
+        
         # Get encoder settings for preview quality (faster than low quality)
         encoder = get_encoder_settings(quality='preview')
         
         # Create a modified filter complex script with explicit scaling at the end
         with open(filter_file, 'r') as f:
-            filter_content = f.read()
-        
-        # Replace the output label [outv] with an intermediate label [outv_unscaled]
-        modified_content = filter_content.replace("[outv];", "[outv_unscaled];")
-        modified_content = modified_content.replace("copy[outv];", "copy[outv_unscaled];")
-        modified_content = modified_content.replace("[outv]", "[outv_unscaled]")
+            modified_content = f.read().rstrip().rstrip(';')
         
-        # Add a scaling step at the end for the preview
+        # Add a scaling step after [outv] for the preview
         # This ensures we're not duplicating any stream labels or trying to use simple filter with complex filtergraph
-        scaling_line = "\n[outv_unscaled]scale=480:-1[outv];"
-        
-        # Add scaling before the audio concat line
-        audio_concat = a_stream + "concat=n=" + str(len(segments_to_keep)) + ":v=0:a=1[outa]"
-        modified_content = modified_content.replace(audio_concat, scaling_line + "\n" + audio_concat)
+        modified_content += ";\n[outv]scale=480:-1[outv_small]"
         
         # Save the modified filter complex
         modified_filter_file = os.path.join(session_folder, "preview_filter_complex.txt")
@@ -523,40 +3098,53 @@ def edit_video():
         
         # Build the FFmpeg command optimized for speed (without -vf scale)
         ffmpeg_cmd = [
-            'ffmpeg', '-y', '-i', original_file, 
+            'ffmpeg', '-y', *segment_inputs,
             '-filter_complex_script', modified_filter_file,
-            '-map', '[outv]', '-map', '[outa]',
-            '-c:v', encoder['c:v'],
-            '-threads', '0',  # Use maximum threads
+            '-map', '[outv_small]', '-map', '[outa]',
+            *encoder_args(encoder),
             '-g', '9999'  # Large GOP for faster encoding
         ]
         
-        # Add encoder-specific settings
-        if 'preset' in encoder:
-            ffmpeg_cmd.extend(['-preset', encoder['preset']])
-        if 'crf' in encoder:
-            ffmpeg_cmd.extend(['-crf', encoder['crf']])
-        if 'quality' in encoder:
-            ffmpeg_cmd.extend(['-quality', encoder['quality']])
+        # Add audio codec with very low bitrate for speed
+        ffmpeg_cmd.extend(['-c:a', 'aac', '-b:a', '32k'])
         
-        # Add extra parameters
-        ffmpeg_cmd.extend(encoder['extra'])
+        if streaming:
+            try:
+                with span('hls_start'):
+                    playlist, following = start_hls_preview(
+                        ffmpeg_cmd, session_id, session_folder, preview_key, job_id, kept_duration
+                    )
+                if following:
+                    # watch_hls_render finishes the job when ffmpeg exits
+                    g.pop('job_id', None)
+                return jsonify({
+                    'success': True,
+                    'session_id': session_id,
+                    'job_id': job_id,
+                    'preview_file': playlist,
+                    'preview_type': 'application/x-mpegURL',
+                    'zoom_events_applied': len(zoom_events) > 0,
+                    'streaming': True,
+                    'cached': False
+                })
+            except Exception as e:
+                print(f"Streaming preview failed, falling back to full render: {e}")
         
-        # Add audio codec and output file with very low bitrate for speed
-        ffmpeg_cmd.extend(['-c:a', 'aac', '-b:a', '32k', preview_file])
+        # Add output file
+        ffmpeg_cmd.extend([*faststart_args(preview_file), preview_file])
         
         # Run FFmpeg
         try:
-            subprocess.run(ffmpeg_cmd, check=True)
+            with span('encode'):
+                run_ffmpeg(ffmpeg_cmd, kept_duration, stage='rendering_preview')
             
             # Cache the preview
-            if session_id not in app.config['PREVIEW_CACHE']:
-                app.config['PREVIEW_CACHE'][session_id] = {}
-            app.config['PREVIEW_CACHE'][session_id][selection_hash] = preview_filename
+            preview_cache_put(cache_key, session_id, preview_file)
             
             return jsonify({
                 'success': True,
                 'session_id': session_id,
+                'job_id': job_id,
                 'preview_file': preview_filename,
                 'zoom_events_applied': len(zoom_events) > 0,
                 'cached': False
@@ -573,94 +3161,199 @@ def edit_video():
         edited_filename = f"edited_{filename}"
         output_file = os.path.join(session_folder, edited_filename)
         
-        # Get encoder settings for high quality
-        encoder_high = get_encoder_settings(quality='high')
-        
-        # Build the FFmpeg command for high quality
-        ffmpeg_cmd1 = [
-            'ffmpeg', '-y', '-i', original_file, 
-            '-filter_complex_script', filter_file,
-            '-map', '[outv]', '-map', '[outa]',
-            '-c:v', encoder_high['c:v']
-        ]
-        
-        # Add encoder-specific settings
-        if 'preset' in encoder_high:
-            ffmpeg_cmd1.extend(['-preset', encoder_high['preset']])
-        if 'quality' in encoder_high:
-            ffmpeg_cmd1.extend(['-quality', encoder_high['quality']])
+        # Smart and parallel render only handle a straight cut, zooms work on
+        # the whole concatenated timeline and go through the filter graph
+        rendered = False
+        if export_mode == 'smart' and not zoom_spans:
+            with span('smart_render'):
+                rendered = smart_render(original_file, segments_to_keep, output_file, session_folder, manifest)
+        elif export_mode == 'parallel' and not zoom_spans:
+            workers = int(data.get('export_workers', app.config['EXPORT_WORKERS']))
+            with span('parallel_render'):
+                rendered = parallel_render(original_file, segments_to_keep, output_file, session_folder, workers)
         
-        # Add extra parameters
-        ffmpeg_cmd1.extend(encoder_high['extra'])
-        
-        # Add audio codec and output file
-        ffmpeg_cmd1.extend(['-c:a', 'aac', output_file])
-        
-        # Run FFmpeg for high quality
-        subprocess.run(ffmpeg_cmd1, check=True)
-        
-        # Get encoder settings for low quality (preview)
+        # Get encoder settings for high quality and for the low quality preview
+        encoder_high = get_encoder_settings(quality='high')
         encoder_low = get_encoder_settings(quality='low')
         
-        # Build the FFmpeg command for preview
-        ffmpeg_cmd2 = [
-            'ffmpeg', '-y', '-i', output_file,
-            '-vf', 'scale=640:-1', 
-            '-c:v', encoder_low['c:v']
-        ]
-        
-        # Add encoder-specific settings
-        if 'preset' in encoder_low:
-            ffmpeg_cmd2.extend(['-preset', encoder_low['preset']])
-        if 'crf' in encoder_low:
-            ffmpeg_cmd2.extend(['-crf', encoder_low['crf']])
-        if 'quality' in encoder_low:
-            ffmpeg_cmd2.extend(['-quality', encoder_low['quality']])
-        
-        # Add extra parameters
-        ffmpeg_cmd2.extend(encoder_low['extra'])
-        
-        # Add audio codec and output file
-        ffmpeg_cmd2.extend(['-c:a', 'aac', '-b:a', '64k', preview_file])
-        
-        # Run FFmpeg for preview
-        subprocess.run(ffmpeg_cmd2, check=True)
+        if not rendered:
+            # Render both outputs in one pass: split the graph after [outv]/[outa]
+            # so the source is decoded and filtered once and the preview is made
+            # from the filtered frames rather than from a re-decoded export
+            with open(filter_file, 'r') as f:
+                filter_content = f.read().rstrip().rstrip(';')
+            filter_content += (
+                ";\n[outv]split=2[outv_high][outv_low];\n"
+                "[outv_low]scale=640:-2[outv_small];\n"
+                "[outa]asplit=2[outa_high][outa_low]"
+            )
+            dual_filter_file = os.path.join(session_folder, "export_filter_complex.txt")
+            with open(dual_filter_file, 'w') as f:
+                f.write(filter_content)
+            
+            # Build the FFmpeg command, output options apply to the file that follows them
+            ffmpeg_cmd1 = [
+                'ffmpeg', '-y', *segment_inputs,
+                '-filter_complex_script', dual_filter_file,
+                '-map', '[outv_high]', '-map', '[outa_high]',
+                *encoder_args(encoder_high),
+                # Add audio codec and high quality output file
+                '-c:a', 'aac', *faststart_args(output_file), output_file,
+                # Preview output
+                '-map', '[outv_small]', '-map', '[outa_low]',
+                *encoder_args(encoder_low),
+                '-c:a', 'aac', '-b:a', '64k', *faststart_args(preview_file), preview_file
+            ]
+            
+            # Run FFmpeg for both outputs
+            with span('encode'):
+                run_ffmpeg(ffmpeg_cmd1, kept_duration, stage='rendering')
+        else:
+            # Smart and parallel renders only write the full file, derive the preview from it
+            ffmpeg_cmd2 = [
+                'ffmpeg', '-y', '-i', output_file,
+                '-vf', 'scale=640:-2',
+                *encoder_args(encoder_low),
+                # Add audio codec and output file
+                '-c:a', 'aac', '-b:a', '64k', *faststart_args(preview_file), preview_file
+            ]
+            
+            # Run FFmpeg for preview
+            with span('encode_preview'):
+                run_ffmpeg(ffmpeg_cmd2, kept_duration, stage='rendering_preview')
         
         # Cache the preview for future use
-        selection_hash = hash(str(sorted_selections) + str(sorted_zoom_events))
-        if session_id not in app.config['PREVIEW_CACHE']:
-            app.config['PREVIEW_CACHE'][session_id] = {}
-        app.config['PREVIEW_CACHE'][session_id][selection_hash] = preview_filename
+        preview_cache_put(cache_key, session_id, preview_file)
         
         return jsonify({
             'success': True,
             'session_id': session_id,
+            'job_id': job_id,
             'edited_file': edited_filename,
             'preview_file': preview_filename
         })
 
-@app.route('/video/<session_id>/<filename>')
+@app.after_request
+def finish_request_job(response):
+    """Mark the job registered by this request (if any) as finished"""
+    job_id = g.pop('job_id', None)
+    if job_id:
+        status = 'completed' if response.status_code < 400 else 'failed'
+        update_job(job_id, status=status, stage=None, finished_at=time.time())
+    progress_context.job_id = None
+    return response
+
+@app.teardown_request
+def fail_request_job(exc):
+    """Mark the job as failed if the request raised instead of returning"""
+    job_id = g.pop('job_id', None)
+    if job_id:
+        update_job(job_id, status='failed', stage=None, error=str(exc), finished_at=time.time())
+    progress_context.job_id = None
+    stop_timing()
+
+@app.after_request
+def attach_timings(response):
+    """Add the request's stage breakdown to JSON responses when asked with ?timings=1"""
+    timings = stop_timing()
+    if timings and request.args.get('timings') == '1' and response.is_json:
+        body = response.get_json()
+        if isinstance(body, dict):
+            body['timings'] = timings
+            response.set_data(json.dumps(body))
+    return response
+
+@app.route('/metrics')
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+# HLS playlists and segments are not reliably in the mimetypes table
+HLS_MIMETYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t'
+}
+
+def iter_file_range(f, length, block_size=256 * 1024):
+    """Yield length bytes from the current position of f, then close it"""
+    try:
+        while length > 0:
+            data = f.read(min(block_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        f.close()
+
+def send_media(folder, filename, as_attachment=False):
+    """Serve a media file with ETag, conditional and single byte-range support"""
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    st = os.stat(path)
+    
+    mimetype = (HLS_MIMETYPES.get(os.path.splitext(filename)[1].lower())
+                or mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    response = Response(mimetype=mimetype, direct_passthrough=True)
+    # Outputs are only ever replaced by rename, so inode, size and mtime name a version
+    etag = f"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"
+    modified = datetime.fromtimestamp(int(st.st_mtime), timezone.utc)
+    response.set_etag(etag)
+    response.last_modified = modified
+    response.accept_ranges = 'bytes'
+    # Always revalidate: playlists grow while rendering and exports are re-rendered in place
+    response.headers['Cache-Control'] = 'no-cache'
+    if as_attachment:
+        response.headers.set('Content-Disposition', 'attachment', filename=os.path.basename(filename))
+    
+    if not is_resource_modified(request.environ, etag=etag, last_modified=modified):
+        response.status_code = 304
+        return response
+    
+    # Behind nginx, hand the transfer to an internal location so ranges and
+    # sendfile are done by the web server without a Python worker
+    accel_prefix = app.config['MEDIA_ACCEL_REDIRECT']
+    if accel_prefix:
+        relative = os.path.relpath(path, app.config['PROCESSED_FOLDER'])
+        response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{quote(relative)}"
+        return response
+    
+    start, stop = 0, st.st_size
+    byte_range = request.range
+    if_range = request.if_range
+    # A stale If-Range or a multi-range request gets the whole file
+    if (byte_range is not None and len(byte_range.ranges) == 1
+            and (if_range.etag is None or if_range.etag == etag)
+            and (if_range.date is None or if_range.date >= modified)):
+        satisfiable = byte_range.range_for_length(st.st_size)
+        if satisfiable is None:
+            response.status_code = 416
+            response.headers['Content-Range'] = f"bytes */{st.st_size}"
+            return response
+        start, stop = satisfiable
+        response.status_code = 206
+        response.headers['Content-Range'] = f"bytes {start}-{stop - 1}/{st.st_size}"
+    
+    f = open(path, 'rb')
+    f.seek(start)
+    if stop == st.st_size:
+        # Players seek with open ended ranges, those can go out through the
+        # server's file wrapper (kernel sendfile under gunicorn) from the offset
+        response.response = wrap_file(request.environ, f)
+    else:
+        response.response = iter_file_range(f, stop - start)
+    response.content_length = stop - start
+    return response
+
+@app.route('/video/<session_id>/<path:filename>')
 def serve_video(session_id, filename):
     session_folder = os.path.join(app.config['PROCESSED_FOLDER'], session_id)
-    return send_from_directory(session_folder, filename)
+    return send_media(session_folder, filename)
 
 @app.route('/download/<session_id>/<filename>')
 def download_video(session_id, filename):
     session_folder = os.path.join(app.config['PROCESSED_FOLDER'], session_id)
-    return send_from_directory(
-        session_folder, 
-        filename, 
-        as_attachment=True
-    )
-
-def get_video_duration(file_path):
-    """Get video duration in seconds using FFprobe"""
-    result = subprocess.run([
-        'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-        '-of', 'default=noprint_wrappers=1:nokey=1', file_path
-    ], capture_output=True, text=True, check=True)
-    
-    return float(result.stdout.strip())
+    return send_media(session_folder, filename, as_attachment=True)
 
 # Clean up old sessions (could be run periodically)
 @app.route('/cleanup', methods=['POST'])
@@ -673,24 +3366,37 @@ def cleanup_old_sessions():
     for session_id in sessions:
         session_path = os.path.join(app.config['PROCESSED_FOLDER'], session_id)
         if os.path.isdir(session_path):
+            abort_upload(session_id)
+            stop_hls_preview(session_path)
             shutil.rmtree(session_path)
             count += 1
     
-    return jsonify({'success': True, 'sessions_removed': count})
+    preview_cache_forget()
+    # Sources and their derived files nobody links to any more go with the sessions
+    store_removed = prune_media_store(unlinked=True)
+    
+    return jsonify({'success': True, 'sessions_removed': count, 'store_entries_removed': store_removed})
 
 # Clean up a specific session
 @app.route('/cleanup_session/<session_id>', methods=['POST'])
 def cleanup_session(session_id):
     session_path = os.path.join(app.config['PROCESSED_FOLDER'], session_id)
     if os.path.isdir(session_path):
+        abort_upload(session_id)
+        stop_hls_preview(session_path)
         shutil.rmtree(session_path)
         # Also clear any cached previews for this session
-        if session_id in app.config['PREVIEW_CACHE']:
-            del app.config['PREVIEW_CACHE'][session_id]
+        preview_cache_forget(session_id)
+        # and the stored source if no other session uses the same video
+        prune_media_store(unlinked=True)
         return jsonify({'success': True, 'message': 'Session data cleared successfully'})
     else:
         return jsonify({'success': False, 'error': 'Session not found'}), 404
 
+@app.route('/preview_cache/stats')
+def preview_cache_stats_endpoint():
+    return jsonify({'success': True, **preview_cache_stats()})
+
 # Preview cuts endpoint - optimized for speed
 @app.route('/preview_cuts', methods=['POST'])
 def preview_cuts():
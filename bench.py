@@ -0,0 +1,293 @@
+# bench.py
+# End-to-end benchmark of /upload, /preview_cuts and /edit on synthetic media.
+#
+# Test videos are generated locally with ffmpeg's lavfi sources (testsrc2 video,
+# pink noise gated into speech and silence), the endpoints are driven through
+# the Flask test client and Whisper is replaced by a stub that emits words over
+# the non-silent audio (or a real model with --model). Every stage reports wall
+# time, CPU time (including ffmpeg child processes) and the peak RSS of the
+# process and its children sampled during that stage, and results
+# can be saved as a baseline and compared against it to flag regressions.
+#
+#   python bench.py --quick                 # one small video, few sweep points
+#   python bench.py --save-baseline         # record bench_baseline.json
+#   python bench.py                         # compare against the baseline
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Speech/silence layouts: seconds of "speech" followed by seconds of silence, repeated
+LAYOUTS = {
+    'talk': (4.0, 1.5),
+    'sparse': (1.5, 3.0)
+}
+
+FULL_MATRIX = {
+    'durations': [30, 120],
+    'resolutions': ['640x360', '1280x720'],
+    'layouts': ['talk', 'sparse'],
+    'cuts': [10, 100],
+    'zooms': [0, 3]
+}
+
+QUICK_MATRIX = {
+    'durations': [30],
+    'resolutions': ['640x360'],
+    'layouts': ['talk'],
+    'cuts': [5, 50],
+    'zooms': [0, 2]
+}
+
+STUB_WORD_SECONDS = 0.3  # Spacing of stub words over non-silent audio
+RSS_SAMPLE_SECONDS = 0.05  # Memory sampling interval while stages run
+rss_samples = []  # (perf_counter, MB) for this process plus its children
+
+def generate_media(folder, duration, resolution, layout):
+    """Render a synthetic test video once and reuse it on later runs"""
+    speech, silence = LAYOUTS[layout]
+    path = os.path.join(folder, f"synthetic_{duration}s_{resolution}_{layout}.mp4")
+    if os.path.exists(path):
+        return path
+    
+    tmp = f"{path}.tmp.mp4"
+    subprocess.run([
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', f"testsrc2=size={resolution}:rate=30:duration={duration}",
+        '-f', 'lavfi', '-i', f"anoisesrc=color=pink:amplitude=0.5:sample_rate=48000:duration={duration}",
+        # Gate the noise so the energy detector finds the silences
+        '-filter:a', f"volume='if(lt(mod(t,{speech + silence}),{speech}),1,0.001)':eval=frame",
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-g', '60', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-shortest', tmp
+    ], check=True)
+    os.replace(tmp, path)
+    return path
+
+def stub_transcribe_words(audio):
+    """Stand-in for Whisper: evenly spaced words over the non-silent audio"""
+    samples = app.load_samples(audio)
+    envelope = app.compute_energy_envelope(samples)
+    total = len(envelope) * app.ENERGY_FRAME_SECONDS
+    silences = app.find_silences(envelope, app.app.config['SILENCE_THRESHOLD_DB'], 0.2, 0.0)
+    
+    words = []
+    speech_start = 0.0
+    for silence_start, silence_end in silences + [(total, total)]:
+        t = speech_start
+        while t + STUB_WORD_SECONDS <= silence_start:
+            words.append({'word': f" w{len(words)}", 'start': round(t, 2), 'end': round(t + STUB_WORD_SECONDS * 0.8, 2)})
+            t += STUB_WORD_SECONDS
+        speech_start = silence_end
+    return words
+
+def current_rss_mb():
+    """Resident memory of this process and its direct children (ffmpeg, transcription pool)"""
+    if not os.path.exists('/proc/self/statm'):
+        # No /proc (macOS): fall back to the lifetime high-water mark, in bytes on macOS
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        rss_scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return max(own.ru_maxrss, children.ru_maxrss) / rss_scale
+    
+    me = os.getpid()
+    pids = [me]
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                # Fields after the parenthesised command name: state, ppid, ...
+                if int(f.read().rsplit(')', 1)[1].split()[1]) == me:
+                    pids.append(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+    
+    pages = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/statm", 'r') as f:
+                pages += int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+def sample_rss():
+    """Record memory in the background so each stage reports its own peak"""
+    while True:
+        rss_samples.append((time.perf_counter(), current_rss_mb()))
+        time.sleep(RSS_SAMPLE_SECONDS)
+
+def usage():
+    """Wall clock, CPU seconds (process and waited children) and current RSS in MB"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        'wall': time.perf_counter(),
+        'cpu': own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime,
+        'rss_mb': current_rss_mb()
+    }
+
+def measure(start, end):
+    # Peak over the samples taken between the two snapshots, not the lifetime maximum
+    peak = max([start['rss_mb'], end['rss_mb']] + [
+        rss for t, rss in rss_samples if start['wall'] <= t <= end['wall']
+    ])
+    return {
+        'wall': round(end['wall'] - start['wall'], 3),
+        'cpu': round(end['cpu'] - start['cpu'], 3),
+        'peak_rss_mb': round(peak, 1)
+    }
+
+def run_upload(client, path, results, prefix):
+    """Upload a file and time the request and each stage of its background job"""
+    start = usage()
+    with open(path, 'rb') as f:
+        response = client.post('/upload', data={'video': (f, os.path.basename(path))},
+                               content_type='multipart/form-data')
+    data = response.get_json()
+    if not data or not data.get('success'):
+        raise RuntimeError(f"Upload failed: {data}")
+    saved = usage()
+    results[f"{prefix}/request"] = measure(start, saved)
+    
+    # Follow the job's stage changes, snapshotting usage at each transition
+    stage, stage_start = 'queued', saved
+    while True:
+        job = app.get_job(data['job_id'])
+        if job['status'] in ('completed', 'failed') or job['stage'] != stage:
+            now = usage()
+            results[f"{prefix}/{stage}"] = measure(stage_start, now)
+            stage, stage_start = job['stage'], now
+        if job['status'] == 'failed':
+            raise RuntimeError(f"Upload job failed: {job['error']}")
+        if job['status'] == 'completed':
+            break
+        with app.jobs_changed:
+            app.jobs_changed.wait(0.05)
+    results[f"{prefix}/total"] = measure(start, usage())
+    return data['session_id'], data['filename']
+
+def make_selections(duration, n_cuts, cut_seconds=0.5):
+    """n_cuts evenly spaced cuts of cut_seconds each"""
+    step = duration / (n_cuts + 1)
+    return [{'start': round(step * (i + 1), 3), 'end': round(step * (i + 1) + min(cut_seconds, step / 2), 3)}
+            for i in range(n_cuts)]
+
+def make_zooms(duration, n_zooms, zoom_seconds=2.0):
+    """n_zooms evenly spaced, non-overlapping zoom events"""
+    step = duration / (n_zooms + 1)
+    return [{
+        'id': i + 1,
+        'startTime': round(step * (i + 1), 3),
+        'endTime': round(step * (i + 1) + min(zoom_seconds, step / 2), 3),
+        'endZoomLevel': 2.0,
+        'focusPoint': {'x': 0.3, 'y': 0.6}
+    } for i in range(n_zooms)]
+
+def run_render(client, endpoint, payload, results, key):
+    start = usage()
+    response = client.post(endpoint, json=payload)
+    if response.status_code != 200:
+        raise RuntimeError(f"{endpoint} failed ({response.status_code}): {response.get_data(as_text=True)[:200]}")
+    results[key] = measure(start, usage())
+
+def run_matrix(matrix, media_folder, export_mode):
+    client = app.app.test_client()
+    results = {}
+    for duration in matrix['durations']:
+        for resolution in matrix['resolutions']:
+            for layout in matrix['layouts']:
+                media = f"{duration}s_{resolution}_{layout}"
+                path = generate_media(media_folder, duration, resolution, layout)
+                print(f"== {media}")
+                run_upload(client, path, results, f"{media}/upload")
+                
+                for n_cuts in matrix['cuts']:
+                    for n_zooms in matrix['zooms']:
+                        # A repeat upload is served from the media store and gives a
+                        # fresh session, so every sweep point starts with a cold preview cache
+                        session_id, filename = run_upload(client, path, results, f"{media}/upload_cached")
+                        payload = {
+                            'session_id': session_id,
+                            'filename': filename,
+                            'selections': make_selections(duration, n_cuts),
+                            'zoom_events': make_zooms(duration, n_zooms)
+                        }
+                        point = f"{media}/cuts{n_cuts}_zooms{n_zooms}"
+                        run_render(client, '/preview_cuts', payload, results, f"{point}/preview")
+                        run_render(client, '/preview_cuts', payload, results, f"{point}/preview_repeat")
+                        run_render(client, '/edit', dict(payload, export_mode=export_mode), results, f"{point}/edit")
+                        print(f"   {point}: preview {results[f'{point}/preview']['wall']}s, "
+                              f"edit {results[f'{point}/edit']['wall']}s")
+    return results
+
+def compare(results, baseline, tolerance, min_delta):
+    """Return (key, baseline wall, current wall) for stages slower than the baseline allows"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        if current['wall'] > previous['wall'] * (1 + tolerance) and current['wall'] - previous['wall'] > min_delta:
+            regressions.append((key, previous['wall'], current['wall']))
+    return regressions
+
+def print_results(results):
+    width = max(len(key) for key in results)
+    print(f"\n{'stage'.ljust(width)}  {'wall s':>8}  {'cpu s':>8}  {'rss MB':>8}")
+    for key, metrics in results.items():
+        print(f"{key.ljust(width)}  {metrics['wall']:>8.3f}  {metrics['cpu']:>8.3f}  {metrics['peak_rss_mb']:>8.1f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark Wizard Cut endpoints on synthetic media")
+    parser.add_argument('--quick', action='store_true', help="Small matrix for a fast check")
+    parser.add_argument('--model', help="Use a real Whisper model (e.g. tiny) instead of the stub")
+    parser.add_argument('--export-mode', default='reencode', choices=['reencode', 'smart', 'parallel'])
+    parser.add_argument('--workdir', help="Folder for media and app state (default: a temporary folder)")
+    parser.add_argument('--output', help="Write results as JSON")
+    parser.add_argument('--baseline', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown over the baseline (fraction)")
+    parser.add_argument('--min-delta', type=float, default=0.1, help="Ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args()
+    
+    # Generated media is kept in the workdir for reuse, app state (created relative
+    # to the working directory on import) starts empty so the first upload is cold
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix='wizardcut-bench-'))
+    media_folder = os.path.join(workdir, 'media')
+    os.makedirs(media_folder, exist_ok=True)
+    os.chdir(tempfile.mkdtemp(prefix='run-', dir=workdir))
+    os.environ['WIZARDCUT_WHISPER_WARMUP'] = '0'
+    if args.model:
+        os.environ['WIZARDCUT_WHISPER_MODEL'] = args.model
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app
+    if not args.model:
+        app.transcribe_words = stub_transcribe_words
+    
+    threading.Thread(target=sample_rss, name='rss-sampler', daemon=True).start()
+    results = run_matrix(QUICK_MATRIX if args.quick else FULL_MATRIX, media_folder, args.export_mode)
+    print_results(results)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for key, previous, current in regressions:
+                print(f"  {key}: {previous:.3f}s -> {current:.3f}s")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
@@ -933,11 +933,23 @@ document.addEventListener('DOMContentLoaded', function() {
             updateProgressBar(progress);
         }, 1000);
         
-        fetch('/upload', {
-            method: 'POST',
-            body: formData
+        // Large files go up in verified, resumable chunks when the browser can hash them
+        const uploadRequest = (window.crypto && crypto.subtle)
+            ? uploadInChunks(file, () => clearInterval(progressInterval))
+            : fetch('/upload', {
+                method: 'POST',
+                body: formData
+            }).then(response => response.json());
+        
+        uploadRequest
+        .then(data => {
+            if (!data.success) {
+                return data;
+            }
+            // Upload is accepted straight away, transcription runs as a background job
+            watchJobProgress(data.job_id, () => clearInterval(progressInterval));
+            return waitForJob(data.job_id);
         })
-        .then(response => response.json())
         .then(data => {
             clearInterval(progressInterval);
             updateProgressBar(100);
@@ -990,6 +1002,155 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    function uploadInChunks(file, onStart) {
+        // Resume an earlier attempt at this exact file if the server still has it
+        const resumeKey = `wizardcut-upload:${file.name}:${file.size}:${file.lastModified}`;
+        const savedId = localStorage.getItem(resumeKey);
+        
+        const resumed = savedId
+            ? fetch(`/uploads/${savedId}`).then(response => response.ok ? response.json() : null)
+            : Promise.resolve(null);
+        
+        return resumed
+        .then(upload => {
+            if (upload) {
+                return upload;
+            }
+            return fetch('/uploads', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({
+                    filename: file.name,
+                    size: file.size
+                })
+            })
+            .then(response => response.json())
+            .then(created => {
+                if (created.success) {
+                    created.received = [];
+                    localStorage.setItem(resumeKey, created.upload_id);
+                }
+                return created;
+            });
+        })
+        .then(upload => {
+            if (!upload.success) {
+                return upload;
+            }
+            onStart();
+            
+            const received = new Set(upload.received);
+            updateProgressBar(Math.round(100 * received.size / upload.n_chunks));
+            
+            const sendChunk = (index, attempt = 1) => {
+                if (index >= upload.n_chunks) {
+                    return Promise.resolve();
+                }
+                if (received.has(index)) {
+                    return sendChunk(index + 1);
+                }
+                
+                const chunk = file.slice(index * upload.chunk_size, (index + 1) * upload.chunk_size);
+                return chunk.arrayBuffer()
+                .then(buffer => crypto.subtle.digest('SHA-256', buffer).then(digest => {
+                    const checksum = Array.from(new Uint8Array(digest))
+                        .map(b => b.toString(16).padStart(2, '0')).join('');
+                    return fetch(`/uploads/${upload.upload_id}/chunks/${index}`, {
+                        method: 'PUT',
+                        headers: {
+                            'X-Chunk-SHA256': checksum
+                        },
+                        body: buffer
+                    });
+                }))
+                .then(response => response.ok, () => false)
+                .then(ok => {
+                    if (ok) {
+                        received.add(index);
+                        updateProgressBar(Math.round(100 * received.size / upload.n_chunks));
+                        return sendChunk(index + 1);
+                    }
+                    // Retry a few times with a growing delay before giving up
+                    if (attempt >= 3) {
+                        throw new Error(`Failed to upload chunk ${index}`);
+                    }
+                    return new Promise(resolve => setTimeout(resolve, 1000 * attempt))
+                        .then(() => sendChunk(index, attempt + 1));
+                });
+            };
+            
+            return sendChunk(0)
+            .then(() => fetch(`/uploads/${upload.upload_id}/complete`, {
+                method: 'POST'
+            }))
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    localStorage.removeItem(resumeKey);
+                }
+                return data;
+            });
+        });
+    }
+    
+    function watchJobProgress(jobId, onProgress) {
+        // Follow live ffmpeg progress for a job over Server-Sent Events
+        if (!jobId || !window.EventSource) {
+            return null;
+        }
+        
+        const source = new EventSource(`/jobs/${jobId}/events`);
+        source.onmessage = event => {
+            const job = JSON.parse(event.data);
+            if (job.progress && job.progress.percent !== null) {
+                if (onProgress) {
+                    onProgress();
+                }
+                const percent = Math.round(job.progress.percent);
+                updateProgressBar(percent);
+                
+                let details = `${percent}%`;
+                if (job.progress.speed) {
+                    details += ` · ${job.progress.speed.toFixed(1)}x`;
+                }
+                if (job.progress.eta !== null) {
+                    details += ` · ETA ${Math.ceil(job.progress.eta)}s`;
+                }
+                progressBar.textContent = details;
+            }
+            if (job.status === 'completed' || job.status === 'failed') {
+                source.close();
+            }
+        };
+        source.onerror = () => source.close();
+        return source;
+    }
+    
+    function waitForJob(jobId, interval = 1000) {
+        // Poll the job result endpoint until the job completes or fails
+        return new Promise((resolve, reject) => {
+            const poll = () => {
+                fetch(`/jobs/${jobId}/result`)
+                    .then(response => {
+                        if (response.status === 202) {
+                            setTimeout(poll, interval);
+                            return null;
+                        }
+                        return response.json();
+                    })
+                    .then(data => {
+                        if (data) {
+                            resolve(data);
+                        }
+                    })
+                    .catch(reject);
+            };
+            poll();
+        });
+    }
+    
     function renderTranscript() {
         transcriptContent.innerHTML = '';
         
@@ -1535,6 +1696,10 @@ document.addEventListener('DOMContentLoaded', function() {
             updateProgressBar(progress);
         }, 1000);
         
+        // Pick the job id ourselves so we can follow progress while the request runs
+        const jobId = (window.crypto && crypto.randomUUID) ? crypto.randomUUID() : null;
+        const progressSource = watchJobProgress(jobId, () => clearInterval(progressInterval));
+        
         fetch('/edit', {
             method: 'POST',
             headers: {
@@ -1545,12 +1710,16 @@ document.addEventListener('DOMContentLoaded', function() {
                 filename: originalFilename,
                 selections: sortedSelections,
                 zoom_events: zoomEvents,
-                preview_only: false
+                preview_only: false,
+                job_id: jobId
             })
         })
         .then(response => response.json())
         .then(data => {
             clearInterval(progressInterval);
+            if (progressSource) {
+                progressSource.close();
+            }
             updateProgressBar(100);
             
             if (data.success) {
@@ -2235,7 +2404,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 session_id: sessionId,
                 filename: originalFilename,
                 selections: sortedSelections,
-                zoom_events: zoomEvents
+                zoom_events: zoomEvents,
+                // Stream the first preview so playback starts while it renders,
+                // later edits reuse cached chunks and come back as a single file
+                streaming: !previewPlayerInitialized
             })
         })
         .then(response => response.json())
@@ -2252,6 +2424,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 
                 // Update video player with preview
                 const previewUrl = `/video/${sessionId}/${data.preview_file}`;
+                const previewType = data.preview_type || 'video/mp4';
                 previewVideoUrl = previewUrl;
                 isShowingEditedVideo = true;
                 
@@ -2279,9 +2452,14 @@ document.addEventListener('DOMContentLoaded', function() {
                                 // Set the source
                                 window.previewPlayer.src({
                                     src: previewUrl,
-                                    type: 'video/mp4'
+                                    type: previewType
                                 });
                                 
+                                // A growing playlist looks live to the player, start from the beginning
+                                if (data.streaming) {
+                                    window.previewPlayer.one('loadedmetadata', () => window.previewPlayer.currentTime(0));
+                                }
+                                
                                 // Set up custom time update handling for the preview player
                                 window.previewPlayer.on('timeupdate', function() {
                                     // Only process events if this is the active tab (MODAL APPROACH)
@@ -2348,9 +2526,13 @@ document.addEventListener('DOMContentLoaded', function() {
                     if (window.previewPlayer) {
                         window.previewPlayer.src({
                             src: previewUrl,
-                            type: 'video/mp4'
+                            type: previewType
                         });
                         
+                        if (data.streaming) {
+                            window.previewPlayer.one('loadedmetadata', () => window.previewPlayer.currentTime(0));
+                        }
+                        
                         // Update preview tab info when metadata loads
                         updatePreviewTabInfo();
                         
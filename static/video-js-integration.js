@@ -235,6 +235,7 @@ document.addEventListener('DOMContentLoaded', function() {
         if (src.endsWith('.mov')) return 'video/quicktime';
         if (src.endsWith('.avi')) return 'video/x-msvideo';
         if (src.endsWith('.flv')) return 'video/x-flv';
+        if (src.endsWith('.m3u8')) return 'application/x-mpegURL';
         
         // Default to mp4
         return 'video/mp4';
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Importing app creates its working folders in the current directory and the
+# first request starts the model warm-up, keep both out of the test run
+os.environ['WIZARDCUT_WHISPER_WARMUP'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp(prefix='wizardcut-tests-'))
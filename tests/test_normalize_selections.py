@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+import app
+
+
+def signs_with_crossings(n_samples, crossings):
+    """Packed sign bitmap whose sign flips at each of the given sample indices"""
+    samples = np.ones(n_samples, dtype=np.int16)
+    for index in crossings:
+        samples[index:] *= -1
+    return np.packbits(samples >= 0)
+
+
+def at(sample):
+    """Time in the middle of a sample, clear of float rounding at the edges"""
+    return (sample + 0.5) / app.SAMPLE_RATE
+
+
+def test_overlapping_and_nested_cuts_merge():
+    selections = [
+        {'start': 5.0, 'end': 6.0},
+        {'start': 0.5, 'end': 2.0},
+        {'start': 1.0, 'end': 1.5},
+        {'start': 1.8, 'end': 3.0},
+        {'start': 6.0, 'end': 7.0}
+    ]
+    assert app.normalize_selections(selections, 10.0) == [
+        {'start': 0.5, 'end': 3.0},
+        {'start': 5.0, 'end': 7.0}
+    ]
+
+
+def test_sliver_at_the_start_is_cut():
+    cuts = app.normalize_selections([{'start': 0.04, 'end': 2.0}], 10.0, min_keep=0.1)
+    assert cuts == [{'start': 0.0, 'end': 2.0}]
+
+
+def test_sliver_at_the_end_is_cut():
+    cuts = app.normalize_selections([{'start': 5.0, 'end': 9.95}], 10.0, min_keep=0.1)
+    assert cuts == [{'start': 5.0, 'end': 10.0}]
+
+
+def test_sliver_between_cuts_is_cut():
+    selections = [{'start': 1.0, 'end': 2.0}, {'start': 2.05, 'end': 3.0}, {'start': 4.0, 'end': 5.0}]
+    assert app.normalize_selections(selections, 10.0, min_keep=0.1) == [
+        {'start': 1.0, 'end': 3.0},
+        {'start': 4.0, 'end': 5.0}
+    ]
+
+
+def test_crossing_across_a_byte_boundary():
+    # The sign flips between samples 1599 and 1600, the last bit of one byte and
+    # the first of the next, and the window starts in the middle of a byte
+    signs = signs_with_crossings(4000, [1600])
+    assert app.nearest_zero_crossing(signs, at(1603), at(1590)) == 1600 / app.SAMPLE_RATE
+
+
+def test_nearest_of_several_crossings_wins():
+    signs = signs_with_crossings(4000, [1584, 1597, 1620])
+    assert app.nearest_zero_crossing(signs, at(1603), at(1580)) == 1597 / app.SAMPLE_RATE
+
+
+def test_no_crossing_keeps_the_edge():
+    signs = signs_with_crossings(4000, [])
+    t = at(1603)
+    assert app.nearest_zero_crossing(signs, t, at(1590)) == t
+
+
+def test_crossing_outside_the_window_is_ignored():
+    signs = signs_with_crossings(4000, [1500, 1700])
+    t = at(1603)
+    assert app.nearest_zero_crossing(signs, t, at(1590)) == t
+
+
+def test_window_past_the_end_of_the_bitmap():
+    signs = signs_with_crossings(4000, [3998])
+    assert app.nearest_zero_crossing(signs, 1.0, at(3990)) == 3998 / app.SAMPLE_RATE
+
+
+def test_snap_keeps_the_edge_inside_its_frame():
+    # 25 fps: 1.01 snaps to the frame at 1.0, then to a crossing in the frame before it
+    signs = signs_with_crossings(32000, [15500, 16200])
+    assert app.snap_cut_edge(1.01, 25, signs) == 15500 / app.SAMPLE_RATE
+    assert app.snap_cut_edge(1.01, 25, None) == 1.0
+
+
+def test_snapped_edges_in_normalized_cuts():
+    signs = signs_with_crossings(32000, [15500, 16200])
+    cuts = app.normalize_selections([{'start': 0.0, 'end': 1.01}], 2.0, fps=25, signs=signs)
+    assert cuts == [{'start': 0.0, 'end': pytest.approx(15500 / app.SAMPLE_RATE)}]
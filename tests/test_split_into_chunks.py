@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+import app
+
+
+def random_layout(rng):
+    """Sorted, disjoint kept segments like the ones /edit produces"""
+    segments = []
+    t = rng.uniform(0, 2)
+    for _ in range(rng.randint(1, 40)):
+        length = rng.choice([rng.uniform(0.1, 0.5), rng.uniform(0.5, 30), rng.uniform(1 / 30, 0.2)])
+        segments.append({'start': t, 'end': t + length})
+        t += length + rng.uniform(0.05, 5)
+    return segments
+
+
+def test_single_chunk_returns_segments_unchanged():
+    segments = [{'start': 0.0, 'end': 5.0}, {'start': 7.0, 'end': 9.5}]
+    assert app.split_into_chunks(segments, 1) == [segments]
+
+
+def test_splits_evenly_across_segments():
+    chunks = app.split_into_chunks([{'start': 0.0, 'end': 10.0}, {'start': 20.0, 'end': 30.0}], 4)
+    assert [[(p['start'], p['end']) for p in chunk] for chunk in chunks] == [
+        [(0.0, 5.0)], [(5.0, 10.0)], [(20.0, 25.0)], [(25.0, 30.0)]
+    ]
+
+
+@pytest.mark.parametrize('seed', range(2000))
+def test_no_degenerate_pieces(seed):
+    rng = random.Random(seed)
+    segments = random_layout(rng)
+    n_chunks = rng.randint(2, 16)
+    chunks = app.split_into_chunks(segments, n_chunks)
+
+    assert 1 <= len(chunks) <= n_chunks
+    pieces = [piece for chunk in chunks for piece in chunk]
+    for piece in pieces:
+        assert piece['end'] - piece['start'] > app.CHUNK_MIN_PIECE
+        assert 'e' not in app.ffmpeg_time(piece['start'])
+        assert 'e' not in app.ffmpeg_time(piece['end'] - piece['start'])
+
+    # Pieces follow each other in source order and cover the kept time
+    assert all(a['end'] <= b['start'] + 1e-9 for a, b in zip(pieces, pieces[1:]))
+    kept = sum(seg['end'] - seg['start'] for seg in segments)
+    covered = sum(piece['end'] - piece['start'] for piece in pieces)
+    assert covered == pytest.approx(kept, abs=app.CHUNK_MIN_PIECE * len(segments))
@@ -0,0 +1,37 @@
+import app
+
+SEGMENTS = [{'start': 0.0, 'end': 5.0}, {'start': 8.0, 'end': 20.0}]
+
+
+def zoom(start, end, level=2.0):
+    return {'startTime': start, 'endTime': end, 'endZoomLevel': level, 'focusPoint': {'x': 0.25, 'y': 0.75}}
+
+
+def test_zoom_starting_in_a_cut_is_dropped_everywhere():
+    spans = app.plan_zoom_spans(SEGMENTS, [zoom(6, 10)], 20.0)
+    assert spans == []
+    assert app.plan_preview_chunks(SEGMENTS, spans) == [(0.0, 5.0, None), (8.0, 20.0, None)]
+
+
+def test_preview_chunks_follow_export_spans():
+    spans = app.plan_zoom_spans(SEGMENTS, [zoom(2, 4), zoom(9, 12, 1.5)], 20.0)
+    assert spans == [(2.0, 4.0, 2.0, 0.25, 0.75), (6.0, 9.0, 1.5, 0.25, 0.75)]
+    assert app.plan_preview_chunks(SEGMENTS, spans) == [
+        (0.0, 2.0, None),
+        (2.0, 4.0, (2.0, 0.25, 0.75)),
+        (4.0, 5.0, None),
+        (8.0, 9.0, None),
+        (9.0, 12.0, (1.5, 0.25, 0.75)),
+        (12.0, 20.0, None)
+    ]
+
+
+def test_zoom_across_a_cut_spans_both_segments():
+    spans = app.plan_zoom_spans(SEGMENTS, [zoom(4, 10)], 20.0)
+    assert spans == [(4.0, 7.0, 2.0, 0.25, 0.75)]
+    assert app.plan_preview_chunks(SEGMENTS, spans) == [
+        (0.0, 4.0, None),
+        (4.0, 5.0, (2.0, 0.25, 0.75)),
+        (8.0, 10.0, (2.0, 0.25, 0.75)),
+        (10.0, 20.0, None)
+    ]